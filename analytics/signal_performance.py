@@ -1,6 +1,8 @@
 import pandas as pd
 from datetime import datetime, timedelta
 from database.db_connection import engine
+from database.writer import replace_rows
+from backtesting.trade_kernel import extract_trades
 
 
 def compute_signal_success_rate():
@@ -14,33 +16,11 @@ def compute_signal_success_rate():
     cutoff = datetime.today() - timedelta(days=365)
     signals = signals[signals["date"] >= cutoff]
 
-    signals = signals.sort_values(["ticker", "date"])
-
-    trades = []
-
-    for ticker, df in signals.groupby("ticker"):
-
-        open_trade = None
-
-        for _, row in df.iterrows():
-
-            if row["signal"] == "BUY" and open_trade is None:
-                open_trade = row
-
-            elif row["signal"] == "SELL" and open_trade is not None:
-
-                ret = (row["close"] - open_trade["close"]) / open_trade["close"]
-
-                trades.append({
-                    "ticker": ticker,
-                    "buy_date": open_trade["date"],
-                    "sell_date": row["date"],
-                    "return": ret
-                })
-
-                open_trade = None
-
-    trades_df = pd.DataFrame(trades)
+    trades_df = (
+        extract_trades(signals)
+        [["ticker", "buy_date", "sell_date", "return_pct"]]
+        .rename(columns={"return_pct": "return"})
+    )
 
     if trades_df.empty:
         print("No completed trades found")
@@ -56,15 +36,9 @@ def compute_signal_success_rate():
         "num_trades": len(trades_df)
     }])
 
-    summary.to_sql("signal_success_metrics",
-                   engine,
-                   if_exists="replace",
-                   index=False)
+    replace_rows(summary, "signal_success_metrics")
 
-    trades_df.to_sql("signal_trades",
-                     engine,
-                     if_exists="replace",
-                     index=False)
+    replace_rows(trades_df, "signal_trades")
 
     # ---------- Company level summary ----------
     company_summary = (
@@ -77,12 +51,7 @@ def compute_signal_success_rate():
         .reset_index()
     )
 
-    company_summary.to_sql(
-        "signal_success_by_company",
-        engine,
-        if_exists="replace",
-        index=False
-    )
+    replace_rows(company_summary, "signal_success_by_company")
 
     print(f"Success rate: {success_rate:.2%}")
     print(f"Average return: {avg_return:.2%}")
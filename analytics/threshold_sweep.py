@@ -0,0 +1,175 @@
+import argparse
+import itertools
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from database.db_connection import config, engine
+from database.writer import upsert
+from database.columnar_store import read_table
+from backtesting.backtest_engine import (
+    BUY, SELL, COMMISSION_BPS, SLIPPAGE_BPS, MAX_HOLDING_DAYS,
+    to_panel, hold_positions, entry_sizes, simulate, closed_trades, summarize
+)
+from scoring.scoring_engine import SCORING_PARAMS, classify
+
+
+sweep_config = config.get("sweep", {})
+
+WORKERS = sweep_config.get("workers", 0) or os.cpu_count()
+GRID = sweep_config.get("grid", {name: [value] for name, value in SCORING_PARAMS.items()})
+
+PANELS = ("close", "rsi", "bb_ratio", "upside")
+
+# memory-mapped panels, opened once per worker process
+_panels = {}
+
+
+# ---------- Panels ----------
+def load_panels():
+    """
+    Reads the features once into dates x tickers arrays of close, RSI,
+    Bollinger band ratio and analyst upside.
+    """
+
+    features = read_table(
+        "features",
+        columns=["date", "ticker", "close", "rsi", "bb_low", "bb_high"]
+    )
+    analyst = pd.read_sql(
+        "SELECT ticker, target_mean_price FROM analyst_expectations", engine
+    )
+
+    dates = pd.Index(np.sort(features["date"].unique()))
+    tickers = pd.Index(np.sort(features["ticker"].unique()))
+
+    def panel(values):
+        return to_panel(features, values, dates, tickers)
+
+    close = panel(features["close"].to_numpy(dtype=float))
+
+    target = (
+        analyst.drop_duplicates("ticker", keep="last")
+        .set_index("ticker")["target_mean_price"]
+        .reindex(tickers)
+        .to_numpy(dtype=float)
+    )
+
+    panels = {
+        "close": close,
+        "rsi": panel(features["rsi"].to_numpy(dtype=float)),
+        "bb_ratio": panel((features["bb_low"] / features["bb_high"]).to_numpy(dtype=float)),
+        "upside": (target[None, :] - close) / close,
+    }
+
+    return dates.to_numpy(), panels
+
+
+def _attach(directory, dates):
+
+    _panels["dates"] = dates
+
+    for name in PANELS:
+        _panels[name] = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+
+
+# ---------- One grid point ----------
+def days_below(rsi, threshold, days):
+    """
+    Per date and ticker, how many of the last `days` dates had RSI under
+    `threshold`, from a running count down the date axis.
+    """
+
+    running = np.cumsum(rsi < threshold, axis=0)
+
+    count = running.copy()
+    count[days:] -= running[:-days]
+
+    return count
+
+
+def evaluate(params) -> dict:
+
+    close = _panels["close"]
+    rsi = _panels["rsi"]
+
+    buy, sell = classify(
+        days_below(rsi, params["rsi_buy"], params["rsi_buy_days"]),
+        rsi, _panels["bb_ratio"], _panels["upside"], params
+    )
+    signal = np.select([buy, sell], [BUY, SELL], default=0).astype(np.int8)
+
+    held, entered = hold_positions(signal, np.isfinite(close), MAX_HOLDING_DAYS)
+
+    curve = simulate(close, held, entered, entry_sizes(held, entered),
+                     COMMISSION_BPS + SLIPPAGE_BPS)
+    summary = summarize(_panels["dates"], curve, close, held, entered)
+
+    entry_d, exit_d, ticker = closed_trades(held, entered)
+    trade_returns = close[exit_d, ticker] / close[entry_d, ticker] - 1
+
+    return {
+        **params,
+        "trades": summary["trades"],
+        "hit_rate": summary["win_rate"],
+        "avg_return": trade_returns.mean() if len(trade_returns) else np.nan,
+        "total_return": summary["total_return"],
+        "sharpe": summary["sharpe"],
+        "max_drawdown": summary["max_drawdown"],
+    }
+
+
+def run_sweep(grid=GRID, workers=WORKERS, top=10):
+
+    print("Running threshold sweep...")
+
+    points = [
+        {**SCORING_PARAMS, **dict(zip(grid, values))}
+        for values in itertools.product(*grid.values())
+    ]
+
+    dates, panels = load_panels()
+
+    if not len(dates):
+        print("No features to sweep over")
+        return
+
+    print(f"  {len(points):,} threshold combinations, {panels['close'].shape[1]:,} tickers "
+          f"x {len(dates):,} dates, {workers} workers")
+
+    # workers map the panels read-only from files written once, instead
+    # of each re-reading SQLite or receiving a pickled copy
+    with tempfile.TemporaryDirectory() as directory:
+
+        for name in PANELS:
+            np.save(os.path.join(directory, f"{name}.npy"), panels[name])
+
+        with ProcessPoolExecutor(workers, initializer=_attach,
+                                 initargs=(directory, dates)) as pool:
+            rows = list(pool.map(
+                evaluate, points,
+                chunksize=max(1, len(points) // (workers * 4))
+            ))
+
+    results = pd.DataFrame(rows)
+    results.insert(0, "run_at", pd.Timestamp.now("UTC").isoformat())
+
+    upsert(results, "sweep_results")
+
+    best = results.sort_values("sharpe", ascending=False).head(top)
+
+    print(best[[*SCORING_PARAMS, "trades", "hit_rate", "avg_return", "sharpe", "max_drawdown"]]
+          .to_string(index=False, float_format=lambda x: f"{x:.4g}"))
+
+    print("Threshold sweep completed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate a grid of signal thresholds over history")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--top", type=int, default=10,
+                        help="combinations to print, by Sharpe ratio")
+    args = parser.parse_args()
+
+    run_sweep(workers=args.workers, top=args.top)
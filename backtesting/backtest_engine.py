@@ -1,31 +1,319 @@
+import argparse
+import numpy as np
 import pandas as pd
-from database.db_connection import engine
+from database.db_connection import config, engine
+from database.writer import upsert, replace_rows
+from database.columnar_store import read_table
 
 
-def run_backtest():
+backtest_config = config.get("backtest", {})
 
-    print("Running backtest...")
+WEIGHTING = backtest_config.get("weighting", "equal")
+MAX_HOLDING_DAYS = backtest_config.get("max_holding_days", 20)
+COMMISSION_BPS = backtest_config.get("commission_bps", 5)
+SLIPPAGE_BPS = backtest_config.get("slippage_bps", 5)
+
+RISK_FREE_RATE = config.get("risk_free_rate", 0.0)
+
+TRADING_DAYS = 252
+
+BUY, SELL = 1, -1
+
+
+# ---------- Dates x tickers panels ----------
+def to_panel(df, values, dates, tickers, fill=np.nan, dtype=float):
+    """
+    Scatters `values` of a long (date, ticker) frame into a dates x tickers
+    array; rows outside `dates` / `tickers` are dropped.
+    """
 
-    prices = pd.read_sql("SELECT date, ticker, close FROM daily_prices", engine)
-    signals = pd.read_sql("SELECT date, ticker, signal FROM signals", engine)
+    out = np.full((len(dates), len(tickers)), fill, dtype=dtype)
 
-    merged = signals.merge(prices, on=["date", "ticker"])
-    merged = merged.sort_values(["ticker", "date"])
+    d = dates.get_indexer(df["date"])
+    t = tickers.get_indexer(df["ticker"])
+    keep = (d >= 0) & (t >= 0)
 
-    merged["next_close"] = merged.groupby("ticker")["close"].shift(-1)
+    out[d[keep], t[keep]] = values[keep]
+    return out
 
-    merged["return"] = (merged["next_close"] - merged["close"]) / merged["close"]
 
-    # Strategy return only when BUY
-    merged["strategy_return"] = merged.apply(
-        lambda x: x["return"] if x["signal"] == "BUY" else 0,
-        axis=1
+def load_panels(weighting=WEIGHTING):
+    """
+    Returns (dates, tickers, close, signal, allocation) with the value
+    arrays shaped dates x tickers, from the first signal date onwards.
+    `allocation` is None unless weighting by daily_portfolio.
+    """
+
+    # HOLD rows carry no event; the (date, signal, ticker) index covers this
+    signals = pd.read_sql(
+        "SELECT date, ticker, signal FROM signals WHERE signal IN ('BUY', 'SELL')",
+        engine
     )
 
-    results = merged["strategy_return"].mean()
+    if signals.empty:
+        return None
+
+    prices = read_table(
+        "daily_prices",
+        columns=["date", "ticker", "close"],
+        start=signals["date"].min()
+    )
+
+    dates = pd.Index(np.sort(prices["date"].unique()))
+    tickers = pd.Index(np.sort(prices["ticker"].unique()))
+
+    def panel(df, values, fill, dtype):
+        return to_panel(df, values, dates, tickers, fill, dtype)
+
+    close = panel(prices, prices["close"].to_numpy(dtype=float), np.nan, float)
+
+    codes = np.select(
+        [signals["signal"].to_numpy() == "BUY", signals["signal"].to_numpy() == "SELL"],
+        [BUY, SELL],
+        default=0
+    ).astype(np.int8)
+    signal = panel(signals, codes, 0, np.int8)
+
+    allocation = None
+
+    if weighting == "allocation":
+        portfolio = pd.read_sql(
+            "SELECT date, ticker, allocation_pct FROM daily_portfolio", engine
+        )
+        allocation = panel(
+            portfolio, portfolio["allocation_pct"].to_numpy(dtype=float), np.nan, float
+        )
+
+    return dates, tickers, close, signal, allocation
+
+
+# ---------- Positions ----------
+def hold_positions(signal, tradable, max_holding_days=MAX_HOLDING_DAYS):
+    """
+    Position state after each close: a ticker is entered on a BUY and held
+    until a SELL or until it has been held `max_holding_days` trading days
+    (0 = no limit). Trades need a price that day. One step per date, each
+    a vector operation across all tickers; holding state and ages are the
+    only carried state.
+    """
+
+    n_dates, n_tickers = signal.shape
+
+    held = np.zeros((n_dates, n_tickers), dtype=bool)
+    entered = np.zeros((n_dates, n_tickers), dtype=bool)
+
+    open_ = np.zeros(n_tickers, dtype=bool)
+    age = np.zeros(n_tickers, dtype=np.int64)
+
+    for t in range(n_dates):
+
+        age[open_] += 1
+
+        expired = (age >= max_holding_days) if max_holding_days else False
+
+        exits = open_ & tradable[t] & ((signal[t] == SELL) | expired)
+        open_ &= ~exits
+
+        entries = ~open_ & ~exits & tradable[t] & (signal[t] == BUY)
+        open_ |= entries
+        age[entries] = 0
+
+        held[t] = open_
+        entered[t] = entries
+
+    return held, entered
+
+
+def entry_sizes(held, entered, allocation=None):
+    """
+    Fraction of equity each position is bought with on its entry date:
+    an equal share of the positions held after that day's trades, or its
+    daily_portfolio allocation. Zero where nothing is entered.
+    """
+
+    if allocation is None:
+        count = held.sum(axis=1, keepdims=True)
+        return np.divide(entered, count, out=np.zeros(held.shape), where=count > 0)
+
+    return np.where(entered, np.nan_to_num(allocation), 0.0)
+
+
+# ---------- Simulation ----------
+def simulate(close, held, entered, sizes, cost_bps, risk_free_rate=RISK_FREE_RATE):
+    """
+    Daily portfolio returns of positions bought at their entry close with
+    `sizes` of equity, left to drift with their price while held and sold
+    at their exit close. An entry that needs more than the free cash trims
+    the other held positions pro rata; that is the only rebalance. Costs
+    are `cost_bps` per unit of traded equity. Returns across missing bars
+    run from the last valid close; uninvested cash earns the risk-free
+    rate.
+    """
+
+    n_dates, n_tickers = close.shape
+
+    # a move across a missing bar is realized on the next valid close
+    prices = pd.DataFrame(close).ffill().to_numpy()
+
+    returns = np.zeros_like(prices)
+    returns[1:] = prices[1:] / prices[:-1] - 1
+    returns = np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0)
+
+    rf_daily = (1 + risk_free_rate) ** (1 / TRADING_DAYS) - 1
+
+    weights = np.zeros((n_dates, n_tickers))
+    gross = np.zeros(n_dates)
+    turnover = np.zeros(n_dates)
+
+    w = np.zeros(n_tickers)
+
+    for t in range(n_dates):
 
-    print(f"Average daily strategy return: {results:.6f}")
+        # drift since the previous close
+        grown = w * (1 + returns[t])
+        gross[t] = grown.sum() + (1 - w.sum()) * (1 + rf_daily) - 1
+        w = grown / (1 + gross[t])
 
-    merged.to_sql("backtest_results", engine, if_exists="replace", index=False)
+        # exits sell the drifted position, entries buy their size
+        target = np.where(held[t], w, 0.0)
+
+        new = entered[t]
+        kept = held[t] & ~new
+
+        # entries adding up to more than all equity are scaled down together
+        bought = sizes[t, new] / max(sizes[t, new].sum(), 1.0)
+        target[new] = bought
+
+        invested = target[kept].sum()
+        if invested + bought.sum() > 1:
+            target[kept] *= (1 - bought.sum()) / invested
+
+        turnover[t] = np.abs(target - w).sum()
+        weights[t] = w = target
+
+    costs = turnover * cost_bps / 10_000
+
+    net = (1 + gross) * (1 - costs) - 1
+
+    equity = np.cumprod(1 + net)
+    drawdown = equity / np.maximum.accumulate(equity) - 1
+
+    return pd.DataFrame({
+        "exposure": weights.sum(axis=1),
+        "turnover": turnover,
+        "costs": costs,
+        "gross_return": gross,
+        "net_return": net,
+        "equity": equity,
+        "drawdown": drawdown,
+    })
+
+
+def closed_trades(held, entered):
+    """
+    (entry row, exit row, ticker column) of every closed position.
+    """
+
+    exited = np.zeros_like(held)
+    exited[1:] = held[:-1] & ~held[1:]
+
+    # column-major order lists each ticker's events chronologically
+    entry_t, entry_d = np.nonzero(entered.T)
+    exit_t, exit_d = np.nonzero(exited.T)
+
+    # the last entry of a ticker still held at the end has no exit
+    last_of_ticker = np.ones(len(entry_t), dtype=bool)
+    last_of_ticker[:-1] = entry_t[1:] != entry_t[:-1]
+    closed = ~(last_of_ticker & held[-1, entry_t])
+
+    return entry_d[closed], exit_d, exit_t
+
+
+def summarize(dates, curve, close, held, entered, risk_free_rate=RISK_FREE_RATE) -> dict:
+
+    net = curve["net_return"].to_numpy()
+    equity = curve["equity"].to_numpy()
+
+    years = len(net) / TRADING_DAYS
+    rf_daily = (1 + risk_free_rate) ** (1 / TRADING_DAYS) - 1
+
+    excess = net - rf_daily
+    volatility = net.std(ddof=1) * np.sqrt(TRADING_DAYS) if len(net) > 1 else np.nan
+
+    sharpe = (
+        excess.mean() / net.std(ddof=1) * np.sqrt(TRADING_DAYS)
+        if len(net) > 1 and net.std(ddof=1) > 0 else np.nan
+    )
+
+    entry_d, exit_d, ticker = closed_trades(held, entered)
+    trade_returns = close[exit_d, ticker] / close[entry_d, ticker] - 1
+
+    return {
+        "start_date": dates[0],
+        "end_date": dates[-1],
+        "total_return": equity[-1] - 1,
+        "cagr": equity[-1] ** (1 / years) - 1 if years > 0 else np.nan,
+        "volatility": volatility,
+        "sharpe": sharpe,
+        "max_drawdown": curve["drawdown"].min(),
+        "annual_turnover": curve["turnover"].mean() * TRADING_DAYS,
+        "trades": len(trade_returns),
+        "win_rate": (trade_returns > 0).mean() if len(trade_returns) else np.nan,
+        "avg_holding_days": (exit_d - entry_d).mean() if len(trade_returns) else np.nan,
+    }
+
+
+def run_backtest(weighting=WEIGHTING, max_holding_days=MAX_HOLDING_DAYS,
+                 commission_bps=COMMISSION_BPS, slippage_bps=SLIPPAGE_BPS):
+
+    print("Running backtest...")
+
+    panels = load_panels(weighting)
+
+    if panels is None:
+        print("No signals to backtest")
+        return
+
+    dates, tickers, close, signal, allocation = panels
+
+    held, entered = hold_positions(signal, np.isfinite(close), max_holding_days)
+
+    sizes = entry_sizes(held, entered, allocation)
+
+    curve = simulate(close, held, entered, sizes, commission_bps + slippage_bps)
+    curve.insert(0, "positions", held.sum(axis=1))
+    curve.insert(0, "date", dates)
+
+    summary = summarize(dates, curve, close, held, entered)
+
+    replace_rows(curve, "backtest_results")
+
+    upsert(pd.DataFrame([{
+        "run_at": pd.Timestamp.now("UTC").isoformat(),
+        "weighting": weighting,
+        "max_holding_days": max_holding_days,
+        "commission_bps": commission_bps,
+        "slippage_bps": slippage_bps,
+        **summary,
+    }]), "backtest_summary")
+
+    print(f"  {summary['start_date']} -> {summary['end_date']}, "
+          f"{len(tickers):,} tickers, {summary['trades']:,} closed trades")
+    print(f"  total return {summary['total_return']:.2%}, CAGR {summary['cagr']:.2%}, "
+          f"Sharpe {summary['sharpe']:.2f}, max drawdown {summary['max_drawdown']:.2%}, "
+          f"turnover {summary['annual_turnover']:.1f}x/yr")
 
     print("Backtest completed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest the BUY/SELL signals")
+    parser.add_argument("--weighting", choices=["equal", "allocation"], default=WEIGHTING)
+    parser.add_argument("--max-holding-days", type=int, default=MAX_HOLDING_DAYS,
+                        help="close positions after this many trading days (0 = until SELL)")
+    parser.add_argument("--commission-bps", type=float, default=COMMISSION_BPS)
+    parser.add_argument("--slippage-bps", type=float, default=SLIPPAGE_BPS)
+    args = parser.parse_args()
+
+    run_backtest(args.weighting, args.max_holding_days,
+                 args.commission_bps, args.slippage_bps)
@@ -1,49 +1,115 @@
+import argparse
 import pandas as pd
+from sqlalchemy import inspect
 from database.db_connection import engine
+from database.writer import upsert, replace_rows
+from backtesting.trade_kernel import extract_trades
 
 
-def build_trade_log():
+def build_trade_log(full=False):
 
     print("Building trade log...")
 
-    signals = pd.read_sql(
-        "SELECT date, ticker, signal, close FROM signals",
-        engine
+    inspector = inspect(engine)
+    incremental = (
+        not full
+        and "trade_state" in inspector.get_table_names()
+        and not pd.read_sql("SELECT 1 FROM trade_state LIMIT 1", engine).empty
     )
 
-    signals = signals.sort_values(["ticker", "date"])
-
-    trades = []
-
-    for ticker, df in signals.groupby("ticker"):
-
-        open_trade = None
-
-        for _, row in df.iterrows():
+    # ---------- load only signals not processed yet ----------
+    if incremental:
+        # driven from trade_state, so each ticker is a range seek on the
+        # signals (ticker, date) key rather than a scan of the history;
+        # CROSS JOIN pins that join order. Tickers without state come from
+        # the universe and from signals newer than any processed date
+        signals = pd.read_sql("""
+            WITH new_tickers AS (
+                SELECT ticker FROM companies
+                UNION
+                SELECT ticker FROM signals
+                WHERE date > (SELECT MAX(last_date) FROM trade_state)
+            )
+            SELECT s.date, s.ticker, s.signal, s.close
+            FROM trade_state t
+            CROSS JOIN signals s
+              ON s.ticker = t.ticker AND s.date > t.last_date
+            UNION ALL
+            SELECT s.date, s.ticker, s.signal, s.close
+            FROM new_tickers n
+            CROSS JOIN signals s
+              ON s.ticker = n.ticker
+            WHERE n.ticker NOT IN (SELECT ticker FROM trade_state)
+        """, engine)
+
+        state = pd.read_sql("SELECT * FROM trade_state", engine)
+
+    else:
+        signals = pd.read_sql(
+            "SELECT date, ticker, signal, close FROM signals",
+            engine
+        )
+
+        state = pd.DataFrame(
+            columns=["ticker", "last_date", "buy_date", "buy_price"]
+        )
+
+    if signals.empty:
+
+        # a rebuild from no signals leaves no trades and no open positions
+        if not incremental:
+            with engine.begin() as conn:
+                replace_rows(pd.DataFrame(columns=["ticker"]), "trade_log", conn)
+                replace_rows(state, "trade_state", conn)
+
+            print("No signals, trade log cleared")
+            return
+
+        print("Trade log already up to date")
+        return
+
+    # ---------- replay carried-over open positions as their BUY ----------
+    carried = state[
+        state["buy_date"].notna() & state["ticker"].isin(signals["ticker"])
+    ]
+
+    carried = pd.DataFrame({
+        "date": carried["buy_date"],
+        "ticker": carried["ticker"],
+        "signal": "BUY",
+        "close": carried["buy_price"]
+    })
+
+    if not carried.empty:
+        signals = pd.concat([carried, signals], ignore_index=True)
+
+    trades_df, open_positions = extract_trades(signals, with_open=True)
+
+    # ---------- new state for every ticker that received signals ----------
+    new_state = (
+        signals.groupby("ticker", as_index=False)["date"].max()
+        .rename(columns={"date": "last_date"})
+        .merge(open_positions, on="ticker", how="left")
+    )
 
-            if row["signal"] == "BUY" and open_trade is None:
-                open_trade = {
-                    "ticker": ticker,
-                    "buy_date": row["date"],
-                    "buy_price": row["close"]
-                }
+    with engine.begin() as conn:
 
-            elif row["signal"] == "SELL" and open_trade is not None:
+        if incremental:
+            upsert(trades_df, "trade_log", conn)
+            upsert(new_state, "trade_state", conn)
 
-                trade = {
-                    **open_trade,
-                    "sell_date": row["date"],
-                    "sell_price": row["close"],
-                    "return_pct":
-                        (row["close"] - open_trade["buy_price"])
-                        / open_trade["buy_price"]
-                }
+        else:
+            replace_rows(trades_df, "trade_log", conn)
+            replace_rows(new_state, "trade_state", conn)
 
-                trades.append(trade)
-                open_trade = None
+    print(f"Trade log updated ({len(trades_df):,} closed trades, "
+          f"{len(open_positions):,} open)")
 
-    trades_df = pd.DataFrame(trades)
 
-    trades_df.to_sql("trade_log", engine, if_exists="replace", index=False)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the BUY→SELL trade log")
+    parser.add_argument("--full", action="store_true",
+                        help="rebuild trade_log and trade_state from all signals")
+    args = parser.parse_args()
 
-    print("Trade log created")
+    build_trade_log(full=args.full)
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+
+
+def pair_trades(tickers, signals):
+    """
+    Pairs each BUY entry with the next SELL exit of the same ticker in a
+    single pass over arrays sorted by ticker, then date.
+
+    A position is open after a row exactly when the latest BUY/SELL seen so
+    far for that ticker is a BUY, so the state is a forward-filled event
+    index instead of a per-row loop. Returns the row positions of closed
+    trade entries and exits, and of entries still open at the end.
+    """
+
+    tickers = np.asarray(tickers)
+    signals = np.asarray(signals)
+
+    n = len(signals)
+    idx = np.arange(n)
+
+    if n == 0:
+        return idx, idx, idx
+
+    is_buy = signals == "BUY"
+    is_sell = signals == "SELL"
+
+    # ---------- ticker blocks ----------
+    block_first = np.ones(n, dtype=bool)
+    block_first[1:] = tickers[1:] != tickers[:-1]
+
+    block_last = np.ones(n, dtype=bool)
+    block_last[:-1] = block_first[1:]
+
+    block_start = np.maximum.accumulate(np.where(block_first, idx, 0))
+
+    # ---------- position state after each row ----------
+    last_event = np.maximum.accumulate(np.where(is_buy | is_sell, idx, -1))
+
+    open_after = (last_event >= block_start) & is_buy[last_event]
+
+    open_before = np.zeros(n, dtype=bool)
+    open_before[1:] = open_after[:-1]
+    open_before[block_first] = False
+
+    # ---------- entries, exits and their pairing ----------
+    entries = is_buy & ~open_before
+    exits = is_sell & open_before
+
+    last_entry = np.maximum.accumulate(np.where(entries, idx, -1))
+
+    entry_idx = last_entry[exits]
+    exit_idx = idx[exits]
+    open_idx = last_entry[block_last & open_after]
+
+    return entry_idx, exit_idx, open_idx
+
+
+def extract_trades(signals, with_open=False):
+    """
+    Builds the closed BUY→SELL trades of a `date, ticker, signal, close` frame.
+    With `with_open`, also returns the positions still open at the end.
+    """
+
+    signals = signals.sort_values(["ticker", "date"])
+
+    entry_idx, exit_idx, open_idx = pair_trades(
+        signals["ticker"].to_numpy(),
+        signals["signal"].to_numpy()
+    )
+
+    buys = signals.iloc[entry_idx]
+    sells = signals.iloc[exit_idx]
+
+    buy_price = buys["close"].to_numpy()
+    sell_price = sells["close"].to_numpy()
+
+    trades = pd.DataFrame({
+        "ticker": sells["ticker"].to_numpy(),
+        "buy_date": buys["date"].to_numpy(),
+        "buy_price": buy_price,
+        "sell_date": sells["date"].to_numpy(),
+        "sell_price": sell_price,
+        "return_pct": (sell_price - buy_price) / buy_price
+    })
+
+    if not with_open:
+        return trades
+
+    opens = signals.iloc[open_idx]
+
+    open_positions = pd.DataFrame({
+        "ticker": opens["ticker"].to_numpy(),
+        "buy_date": opens["date"].to_numpy(),
+        "buy_price": opens["close"].to_numpy()
+    })
+
+    return trades, open_positions
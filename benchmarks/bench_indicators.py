@@ -0,0 +1,89 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic_market import price_chunk, trading_dates, SECTORS
+from features.technical_indicators import add_indicators
+from features.panel_indicators import add_indicators_panel
+
+
+INDICATOR_COLUMNS = [
+    "rsi", "bb_high", "bb_low", "macd",
+    "rsi_factor", "bb_factor", "macd_factor", "trend_factor",
+]
+
+
+def synthetic_prices(tickers, years, gap_rate, seed=0) -> pd.DataFrame:
+
+    rng = np.random.default_rng(seed)
+    dates = trading_dates(years)
+
+    prices = price_chunk(
+        [f"S{i:04d}" for i in range(tickers)],
+        rng.integers(0, len(SECTORS), tickers),
+        dates,
+        rng.normal(0.0003, 0.01, len(dates)),
+        rng.normal(0, 0.008, (len(dates), len(SECTORS))),
+        rng
+    )
+
+    # NaN closes like the empty rows of a yfinance batch download
+    gaps = rng.random(len(prices)) < gap_rate
+    prices.loc[gaps, "close"] = np.nan
+
+    return prices
+
+
+def ta_engine(prices):
+
+    frames = []
+
+    for ticker, df in prices.groupby("ticker"):
+        frames.append(add_indicators(df.sort_values("date")))
+
+    return pd.concat(frames)
+
+
+def run(tickers, years, gap_rate):
+
+    prices = synthetic_prices(tickers, years, gap_rate)
+
+    print(f"Benchmarking indicator engines on {len(prices):,} bars "
+          f"({tickers:,} tickers x {years} years)...")
+
+    start = time.perf_counter()
+    expected = ta_engine(prices)
+    ta_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = add_indicators_panel(prices)
+    panel_seconds = time.perf_counter() - start
+
+    print(f"{'ta, per-ticker loop':<24} {ta_seconds:8.2f}s")
+    print(f"{'panel':<24} {panel_seconds:8.2f}s  ({ta_seconds / panel_seconds:.1f}x)")
+
+    expected = expected.sort_values(["ticker", "date"]).reset_index(drop=True)
+    actual = actual.sort_values(["ticker", "date"]).reset_index(drop=True)
+
+    print("\nLargest difference (relative to max(1, |ta|)):")
+
+    for col in INDICATOR_COLUMNS:
+        a = expected[col].to_numpy(dtype=float)
+        b = actual[col].to_numpy(dtype=float)
+
+        same_nans = np.array_equal(np.isnan(a), np.isnan(b))
+        both = ~np.isnan(a) & ~np.isnan(b)
+        error = np.max(np.abs(a[both] - b[both]) / np.maximum(1, np.abs(a[both])), initial=0)
+
+        print(f"  {col:<14} {error:.1e}  {'NaNs match' if same_nans else 'NaN MISMATCH'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the ta and panel indicator engines")
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--gap-rate", type=float, default=0.001,
+                        help="share of bars with a missing close")
+    args = parser.parse_args()
+
+    run(args.tickers, args.years, args.gap_rate)
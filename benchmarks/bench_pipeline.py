@@ -0,0 +1,199 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, UTC
+
+
+STAGES = [
+    ("features", "pipelines.feature_pipeline", "run_feature_pipeline"),
+    ("forward_returns", "features.forward_returns", "compute_forward_returns"),
+    ("weights", "scoring.weight_training", "train_factor_weights"),
+    ("predictions", "scoring.prediction_score_engine", "run_prediction_engine"),
+    ("scoring", "scoring.scoring_engine", "run_scoring"),
+    ("trade_log", "backtesting.trade_builder", "build_trade_log"),
+    ("backtest", "backtesting.backtest_engine", "run_backtest"),
+    ("ranking", "risk.ranking_engine", "run_ranking"),
+    ("allocator", "portfolio.allocator", "run_allocator"),
+]
+
+# stages re-run after the held-back days are appended
+INCREMENTAL_STAGES = ["features", "forward_returns", "weights", "predictions", "scoring", "trade_log", "ranking", "allocator"]
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def git_commit() -> str:
+
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(RESULTS_DIR)
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_stages(names, phase):
+
+    import importlib
+    from pipelines import run_metrics
+
+    results = []
+
+    for name, module, function in STAGES:
+
+        if name not in names:
+            continue
+
+        fn = getattr(importlib.import_module(module), function)
+
+        with run_metrics.measure(name) as metrics:
+            fn()
+
+        row = metrics.as_row()
+        row["phase"] = phase
+        results.append(row)
+
+        print(f"  {phase:<12} {name:<16} {metrics.wall_seconds:8.2f}s "
+              f"cpu {metrics.cpu_seconds:7.2f}s  sql {metrics.sql_seconds:7.2f}s  "
+              f"rss {metrics.peak_rss_mb:7.0f} MB")
+
+    return results
+
+
+def run(scale, tickers, years, seed, holdout_days, workdir, stages):
+
+    db_path = os.path.join(workdir, "bench.db")
+
+    # a database left by an earlier run would turn the "full" phase into
+    # an incremental one ("already up to date"), so every run starts empty
+    for leftover in [db_path, *(db_path + suffix for suffix in ("-wal", "-shm", "-journal"))]:
+        if os.path.exists(leftover):
+            print(f"Removing previous {leftover}")
+            os.remove(leftover)
+
+    shutil.rmtree(os.path.join(workdir, "columnar"), ignore_errors=True)
+
+    # every pipeline module binds its engine to VESIGN_DB at import time,
+    # so the benchmark database has to be chosen before they load
+    os.environ["VESIGN_DB"] = db_path
+    os.environ["VESIGN_OFFLINE"] = "1"
+
+    from benchmarks.synthetic_market import SCALES, generate
+    from database import columnar_store
+    from database.writer import upsert
+
+    # keep a columnar mirror (if enabled) away from the real store
+    columnar_store.STORE_PATH = os.path.join(workdir, "columnar")
+
+    tickers = tickers or SCALES[scale][0]
+    years = years or SCALES[scale][1]
+
+    start = time.perf_counter()
+    held_back = generate(db_path, tickers=tickers, years=years, seed=seed,
+                         holdout_days=holdout_days)
+    generate_seconds = time.perf_counter() - start
+
+    if columnar_store.enabled("daily_prices"):
+        columnar_store.sync_from_sqlite("daily_prices")
+
+    print(f"Synthetic market written in {generate_seconds:.1f}s")
+
+    results = run_stages(stages, "full")
+
+    if held_back is not None and len(held_back):
+        upsert(held_back, "daily_prices")
+        columnar_store.mirror("daily_prices", held_back)
+
+        results += run_stages([s for s in INCREMENTAL_STAGES if s in stages], "incremental")
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(UTC).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "scale": {"tickers": tickers, "years": years, "seed": seed, "holdout_days": holdout_days},
+        "generate_seconds": generate_seconds,
+        "db_size_mb": os.path.getsize(db_path) / 1024 ** 2,
+        "stages": results,
+    }
+
+
+def compare(baseline_path, candidate_path):
+
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    with open(candidate_path) as f:
+        candidate = json.load(f)
+
+    before = {(r["phase"], r["stage"]): r["wall_seconds"] for r in baseline["stages"]}
+
+    print(f"{baseline['commit']} -> {candidate['commit']}  "
+          f"({candidate['scale']['tickers']:,} tickers x {candidate['scale']['years']} years)")
+
+    for row in candidate["stages"]:
+
+        old = before.get((row["phase"], row["stage"]))
+        new = row["wall_seconds"]
+
+        change = f"({new / old:5.2f}x)" if old else ""
+        old = f"{old:8.2f}s" if old is not None else f"{'-':>9}"
+
+        print(f"  {row['phase']:<12} {row['stage']:<16} {old} -> {new:8.2f}s {change}")
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    # nothing that imports database.db_connection may load before run()
+    # points VESIGN_DB at the benchmark database
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage on a synthetic market")
+    parser.add_argument("--scale", choices=["small", "medium", "large"], default="small")
+    parser.add_argument("--tickers", type=int, help="overrides the scale's ticker count")
+    parser.add_argument("--years", type=int, help="overrides the scale's history length")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--holdout-days", type=int, default=5,
+                        help="bars appended after the full run to time incremental stages")
+    parser.add_argument("--stage", action="append", dest="stages",
+                        choices=[name for name, _, _ in STAGES])
+    parser.add_argument("--workdir", help="keep the benchmark database here")
+    parser.add_argument("--output", help="results JSON path (default: benchmarks/results/)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CANDIDATE"),
+                        help="compare two results files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        sys.exit(0)
+
+    stages = args.stages or [name for name, _, _ in STAGES]
+
+    with tempfile.TemporaryDirectory() as tmp:
+
+        workdir = args.workdir or tmp
+        os.makedirs(workdir, exist_ok=True)
+
+        result = run(args.scale, args.tickers, args.years, args.seed,
+                     args.holdout_days, workdir, stages)
+
+    n_tickers, n_years = result["scale"]["tickers"], result["scale"]["years"]
+
+    output = args.output or os.path.join(
+        RESULTS_DIR,
+        f"{datetime.now(UTC):%Y%m%dT%H%M%S}-{result['commit']}-{n_tickers}x{n_years}.json"
+    )
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+
+    print(f"Results written to {output}")
@@ -0,0 +1,81 @@
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from database.db_connection import make_engine
+from database.schema import init_schema
+from database.writer import upsert
+
+
+def synthetic_features(rows: int) -> pd.DataFrame:
+
+    rng = np.random.default_rng(0)
+
+    n_tickers = 500
+    dates = pd.bdate_range("2000-01-03", periods=-(-rows // n_tickers))
+
+    df = pd.DataFrame({
+        "date": np.repeat(dates.strftime("%Y-%m-%d"), n_tickers)[:rows],
+        "ticker": np.tile([f"T{i:04d}" for i in range(n_tickers)], len(dates))[:rows],
+    })
+
+    for col in ["open", "high", "low", "close", "Adj Close"]:
+        df[col] = rng.uniform(10, 500, rows)
+
+    df["volume"] = rng.integers(1e5, 1e7, rows)
+
+    for col in ["rsi", "bb_high", "bb_low", "macd",
+                "rsi_factor", "bb_factor", "macd_factor", "trend_factor"]:
+        df[col] = rng.normal(size=rows)
+
+    return df
+
+
+def timed(label, fn):
+
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+
+    print(f"{label:<32} {elapsed:8.2f}s  {result or ''}")
+
+    return elapsed
+
+
+def run(rows: int):
+
+    print(f"Benchmarking writers on {rows:,} feature rows...")
+
+    df = synthetic_features(rows)
+
+    with tempfile.TemporaryDirectory() as tmp:
+
+        to_sql_engine = make_engine(os.path.join(tmp, "to_sql.db"))
+        upsert_engine = make_engine(os.path.join(tmp, "upsert.db"))
+
+        init_schema(upsert_engine)
+
+        def write_to_sql():
+            with to_sql_engine.begin() as conn:
+                df.to_sql("features", conn, if_exists="append", index=False)
+
+        def write_upsert():
+            with upsert_engine.begin() as conn:
+                return upsert(df, "features", conn)
+
+        timed("to_sql append (no keys)", write_to_sql)
+        timed("upsert, all inserts", write_upsert)
+        timed("upsert, all updates", write_upsert)
+
+        to_sql_engine.dispose()
+        upsert_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark upsert vs to_sql")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    run(args.rows)
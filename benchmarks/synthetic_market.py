@@ -0,0 +1,180 @@
+import argparse
+import numpy as np
+import pandas as pd
+from database.db_connection import make_engine
+from database.schema import init_schema
+from database.writer import upsert
+
+
+SECTORS = [
+    "Information Technology", "Health Care", "Financials", "Consumer Discretionary",
+    "Communication Services", "Industrials", "Consumer Staples", "Energy",
+    "Utilities", "Real Estate", "Materials",
+]
+
+SCALES = {
+    "small": (500, 3),
+    "medium": (2000, 10),
+    "large": (5000, 20),
+}
+
+TRADING_DAYS_PER_YEAR = 252
+TICKER_CHUNK = 250
+
+
+def trading_dates(years, end=None) -> pd.DatetimeIndex:
+
+    end = pd.Timestamp(end or pd.Timestamp.now().normalize()) - pd.offsets.BDay(1)
+
+    return pd.bdate_range(end=end, periods=years * TRADING_DAYS_PER_YEAR)
+
+
+def companies_frame(tickers, rng) -> pd.DataFrame:
+
+    return pd.DataFrame({
+        "ticker": tickers,
+        "company": [f"Synthetic {t} Inc." for t in tickers],
+        "sector": rng.choice(SECTORS, len(tickers)),
+        "website": [f"https://www.{t.lower()}.example" for t in tickers],
+        "domain": [f"{t.lower()}.example" for t in tickers],
+        "logo_url": None,
+    })
+
+
+def price_chunk(tickers, sectors, dates, market, sector_moves, rng) -> pd.DataFrame:
+    """
+    Bars for a block of tickers: log returns are beta * market + sector +
+    idiosyncratic noise, with OHLC built around the close path. About a
+    fifth of the tickers list part-way through the history.
+    """
+
+    n_days, n_tickers = len(dates), len(tickers)
+
+    beta = rng.uniform(0.6, 1.4, n_tickers)
+    vol = rng.uniform(0.01, 0.03, n_tickers)
+
+    returns = (
+        market[:, None] * beta
+        + sector_moves[:, sectors]
+        + rng.normal(0, 1, (n_days, n_tickers)) * vol
+    )
+
+    close = np.exp(rng.normal(np.log(60), 0.8, n_tickers)) * np.exp(np.cumsum(returns, axis=0))
+
+    prev_close = np.vstack([close[:1], close[:-1]])
+    open_ = prev_close * np.exp(rng.normal(0, 0.3, (n_days, n_tickers)) * vol)
+    high = np.maximum(open_, close) * np.exp(np.abs(rng.normal(0, 0.5, (n_days, n_tickers))) * vol)
+    low = np.minimum(open_, close) * np.exp(-np.abs(rng.normal(0, 0.5, (n_days, n_tickers))) * vol)
+
+    volume = np.exp(rng.normal(np.log(2e6), 1.0, n_tickers)) \
+        * np.exp(rng.normal(0, 0.4, (n_days, n_tickers)))
+
+    # late listings: no bars before a random start day
+    first_day = np.where(rng.random(n_tickers) < 0.2, rng.integers(0, n_days // 2, n_tickers), 0)
+    listed = np.arange(n_days)[:, None] >= first_day
+
+    day_idx, ticker_idx = np.nonzero(listed)
+
+    return pd.DataFrame({
+        "date": dates[day_idx].strftime("%Y-%m-%d"),
+        "ticker": np.asarray(tickers)[ticker_idx],
+        "open": open_[listed],
+        "high": high[listed],
+        "low": low[listed],
+        "close": close[listed],
+        "Adj Close": close[listed],
+        "volume": volume[listed].astype(np.int64),
+    })
+
+
+def generate(db_path, tickers=500, years=3, seed=0, end=None, holdout_days=0):
+    """
+    Writes companies, daily_prices, fundamentals and analyst_expectations
+    for a synthetic universe into `db_path`. The last `holdout_days` bars
+    are returned instead of written so callers can replay them as a later
+    incremental update.
+    """
+
+    rng = np.random.default_rng(seed)
+
+    engine = make_engine(db_path)
+    init_schema(engine)
+
+    dates = trading_dates(years, end)
+    cutoff = dates[-holdout_days].strftime("%Y-%m-%d") if holdout_days else None
+
+    names = [f"S{i:04d}" for i in range(tickers)]
+    companies = companies_frame(names, rng)
+    sector_ids = companies["sector"].map({s: i for i, s in enumerate(SECTORS)}).to_numpy()
+
+    market = rng.normal(0.0003, 0.01, len(dates))
+    sector_moves = rng.normal(0, 0.008, (len(dates), len(SECTORS)))
+
+    print(f"Generating {tickers:,} tickers x {len(dates):,} days...")
+
+    last_close = {}
+    held_back = []
+
+    for start in range(0, tickers, TICKER_CHUNK):
+
+        block = slice(start, start + TICKER_CHUNK)
+        prices = price_chunk(names[block], sector_ids[block], dates, market, sector_moves, rng)
+
+        last_close.update(prices.groupby("ticker")["close"].last().to_dict())
+
+        if cutoff is not None:
+            held_back.append(prices[prices["date"] >= cutoff])
+            prices = prices[prices["date"] < cutoff]
+
+        with engine.begin() as conn:
+            upsert(prices, "daily_prices", conn)
+
+    # ---------- reference tables ----------
+    close = companies["ticker"].map(last_close).to_numpy()
+    shares = np.exp(rng.normal(np.log(3e8), 1.0, tickers))
+    target_mean = close * (1 + rng.normal(0.08, 0.15, tickers))
+
+    fundamentals = pd.DataFrame({
+        "ticker": names,
+        "market_cap": close * shares,
+    })
+
+    analyst = pd.DataFrame({
+        "ticker": names,
+        "target_mean_price": target_mean,
+        "target_high_price": target_mean * rng.uniform(1.1, 1.5, tickers),
+        "target_low_price": target_mean * rng.uniform(0.5, 0.9, tickers),
+        "number_of_analysts": rng.integers(1, 45, tickers).astype(float),
+        "last_update": pd.Timestamp.now("UTC").isoformat(),
+    })
+
+    with engine.begin() as conn:
+        upsert(companies, "companies", conn)
+        upsert(fundamentals, "fundamentals", conn)
+        upsert(analyst, "analyst_expectations", conn)
+
+    engine.dispose()
+
+    if cutoff is None:
+        return None
+
+    return pd.concat(held_back, ignore_index=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic market database")
+    parser.add_argument("db_path")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--tickers", type=int, help="overrides the scale's ticker count")
+    parser.add_argument("--years", type=int, help="overrides the scale's history length")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    n_tickers, n_years = SCALES[args.scale]
+
+    generate(
+        args.db_path,
+        tickers=args.tickers or n_tickers,
+        years=args.years or n_years,
+        seed=args.seed
+    )
@@ -1,15 +1,13 @@
 import streamlit as st
 import pandas as pd
-import yfinance as yf
-from sqlalchemy import create_engine
-from datetime import datetime, time as dt_time, UTC
-import pytz
 import time
-import os
-from main import daily_run   # your pipeline runner
+from database import data_version
+from database.db_connection import config, engine
+from pipelines import bootstrap
+from utils.live_quotes import QuotePoller, market_is_open
 
-if not os.path.exists("vesign.db"):
-    daily_run()   # build database automatically
+# Only what rendering needs is imported here; the pipelines (yfinance,
+# scikit-learn, ta, ...) load inside the background bootstrap process.
 
 if "signal_filter" not in st.session_state:
     st.session_state.signal_filter = "ALL"
@@ -38,17 +36,93 @@ st.markdown(
 #     unsafe_allow_html=True
 # )
 
-engine = create_engine("sqlite:///vesign.db")
+st.title("Vesign Trading System")
+
 
-# wait until tables exist
-for _ in range(30):
+# ---------- Bootstrap ----------
+def database_ready():
     try:
-        pd.read_sql("SELECT 1 FROM signals LIMIT 1", engine)
-        break
-    except:
-        time.sleep(5)
+        with engine.connect() as conn:
+            return conn.exec_driver_sql("SELECT 1 FROM signals LIMIT 1").first() is not None
+    except Exception:
+        return False
+
+
+def show_bootstrap_progress(progress):
+
+    if progress.get("status") == "failed":
+        st.error(f"Building the database failed: {progress.get('error')}")
+        st.caption(f"See {bootstrap.LOG_PATH}")
+        return
+
+    if progress.get("status") == "done":
+        st.warning("The bootstrap run finished without producing signals.")
+        st.caption(f"See {bootstrap.LOG_PATH}")
+        return
+
+    step, total = progress.get("step"), progress.get("total")
+    elapsed = time.time() - progress.get("started_at", time.time())
+
+    if total:
+        st.progress(
+            step / total,
+            text=f"Building the database: {progress.get('stage')} "
+                 f"({step + 1}/{total}, {elapsed:.0f}s elapsed)"
+        )
+    else:
+        st.info("Building the database...")
+
+
+if not database_ready():
+
+    progress = bootstrap.read_progress()
+
+    # finished or failed runs are not retried on every rerun
+    if progress is None or progress.get("status") == "running":
+        bootstrap.start()   # no-op while the job is alive
+        progress = bootstrap.read_progress()
+
+    show_bootstrap_progress(progress)
+
+    if progress.get("status") == "running":
+        time.sleep(3)
+        st.rerun()
+
+    st.stop()
+
+# ---------- Cached data access (shared by all sessions) ----------
+# Every loader takes the pipeline's data version as an argument, so entries
+# stay valid until the next pipeline run instead of expiring on a timer.
+version = data_version.current()
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def load_query(query, version):
+    return pd.read_sql(query, engine)
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def load_market_caps(version):
+    return pd.read_sql("""
+        SELECT ticker, MAX(market_cap) AS market_cap
+        FROM fundamentals
+        GROUP BY ticker
+    """, engine)
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def load_trades(ticker, version):
+    return pd.read_sql(
+        """
+        SELECT *
+        FROM trade_log
+        WHERE ticker = ?
+        ORDER BY buy_date
+        """,
+        engine,
+        params=(ticker,)
+    )
 
-st.title("Vesign Trading System")
 
 search_col, _ = st.columns([2, 9])  # left small column, right empty space
 
@@ -66,10 +140,10 @@ def style_variance(val):
 
 
 # ---------- Market helpers ----------
-def market_is_open():
-    et = pytz.timezone("US/Eastern")
-    now = datetime.now(UTC).astimezone(et)
-    return now.weekday() < 5 and dt_time(9, 30) <= now.time() <= dt_time(16, 0)
+@st.cache_resource
+def quote_poller():
+    # one background poller per dashboard process, shared by every session
+    return QuotePoller().start()
 
 
 def add_live_price(df):
@@ -80,22 +154,11 @@ def add_live_price(df):
 
     tickers = df["ticker"].unique().tolist()
 
-    live_data = yf.download(
-        tickers,
-        period="1d",
-        interval="1m",
-        progress=False
-    )
-
-    prices = {}
-
-    for t in tickers:
-        try:
-            prices[t] = live_data["Close"][t].dropna().iloc[-1]
-        except:
-            prices[t] = None
+    poller = quote_poller()
+    poller.track(tickers)
 
-    df["Live Price"] = df["ticker"].map(prices)
+    # latest stored quotes; tickers not polled yet show as empty
+    df["Live Price"] = df["ticker"].map(poller.quotes(tickers))
 
     return df
 
@@ -135,12 +198,13 @@ def add_live_variance(df):
 @st.cache_data(ttl=3600)  # cache for 1 hour
 def fetch_market_caps(tickers):
 
-    ticker_objs = yf.Tickers(" ".join(tickers))
+    from providers import get_provider
 
+    # shares the on-disk `.info` cache filled by the ticker info pipeline
     caps = {}
     for t in tickers:
         try:
-            caps[t] = ticker_objs.tickers[t].info.get("marketCap")
+            caps[t] = get_provider().info(t).get("marketCap")
         except:
             caps[t] = None
 
@@ -160,11 +224,7 @@ def apply_signal_filter(df):
 
 # ---------- Market Cap ----------
 def add_market_cap(df):
-    caps = pd.read_sql("""
-        SELECT ticker, MAX(market_cap) AS market_cap
-        FROM fundamentals
-        GROUP BY ticker
-    """, engine)
+    caps = load_market_caps(version)
 
     df = df.merge(caps, on="ticker", how="left")
     df["market_cap"] = df["market_cap"] / 1_000_000_000
@@ -264,9 +324,35 @@ column_config = {
 }
 
 
+def show_quote_status():
+
+    if not market_is_open():
+        return
+
+    metrics = quote_poller().metrics()
+    age = metrics["staleness_seconds"]
+
+    status = "waiting for first quotes" if age is None else f"updated {age:.0f}s ago"
+
+    if metrics["stale"] and age is not None:
+        status = f"stale, {status}"
+
+    if metrics["consecutive_errors"]:
+        status += f" · {metrics['consecutive_errors']} failed polls ({metrics['last_error']})"
+
+    st.caption(f"Live prices: {status}")
+
+
+TOP_K = config.get("ranking", {}).get("top_k", 20)
+
+BUY_SIGNALS_TITLE = f"Today's top {TOP_K} BUY signals" if TOP_K else "Today's BUY signals"
+
+
 def display_section(title, query):
 
-    df = pd.read_sql(query, engine)
+    df = load_query(query, version)
+
+    no_buys_today = title == BUY_SIGNALS_TITLE and df.empty
 
     if "ticker" in df.columns and "date" in df.columns:
         df = df.sort_values("date", ascending=False) \
@@ -275,7 +361,7 @@ def display_section(title, query):
     df = apply_search(df)
 
     # Sort Today's BUY signals
-    if title == "Today's BUY signals" and "rank" in df.columns:
+    if title == BUY_SIGNALS_TITLE and "rank" in df.columns:
         df = df.sort_values("rank", ascending=True)
 
     if title == "Signals":
@@ -300,10 +386,15 @@ def display_section(title, query):
     else:
         st.header(f"{title} ({len(df):,})")
 
+    if no_buys_today:
+        st.info("No BUY signals today")
+        return
+
     df = add_market_cap(df)
     if "close" in df.columns:
         df = add_live_price(df)
         df = add_live_variance(df)
+        show_quote_status()
 
     if title == "Signals":
         df = apply_signal_filter(df)
@@ -332,14 +423,9 @@ def display_section(title, query):
             df["Ticker"].unique()
         )
 
-        trades = pd.read_sql(f"""
-            SELECT *
-            FROM trade_log
-            WHERE ticker = '{selected_ticker}'
-            ORDER BY buy_date
-        """, engine)
+        trades = load_trades(selected_ticker, version)
 
-        df = pd.read_sql(query, engine)
+        df = load_query(query, version)
 
         # remove duplicates by latest date per ticker
         if "ticker" in df.columns and "date" in df.columns:
@@ -369,33 +455,20 @@ def display_section(title, query):
             )
 
 
+# daily_ranked only has dates with BUY candidates, so "today" is the
+# latest signal date rather than the latest ranked one
 display_section(
-    "Today's BUY signals",
+    BUY_SIGNALS_TITLE,
     """
-    SELECT s.*, c.company, c.logo_url
-    FROM signals s
+    SELECT r.*, c.company, c.logo_url
+    FROM daily_ranked r
     LEFT JOIN companies c
-    ON s.ticker = c.ticker
-    WHERE DATE (s.date) = (
-        SELECT DATE(MAX(date)) FROM signals
-    )
-    AND s.signal = 'BUY'
+    ON r.ticker = c.ticker
+    WHERE r.date = (SELECT MAX(date) FROM signals)
     """
 )
 
 
-# display_section(
-#     "Ranked Signals",
-#     """
-#     SELECT r.*, c.company, c.logo_url
-#     FROM daily_ranked r
-#     LEFT JOIN companies c
-#     ON r.ticker = c.ticker
-#     WHERE r.date = (SELECT MAX(date) FROM daily_ranked)
-#     """
-# )
-
-
 display_section(
     "Signals",
     """
@@ -0,0 +1,240 @@
+import argparse
+import os
+import shutil
+import uuid
+import zlib
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from database.db_connection import BASE_DIR, config, engine
+from database.schema import metadata, normalize_dates
+
+
+storage_config = config.get("storage", {})
+
+STORE_PATH = os.path.join(BASE_DIR, storage_config.get("path", "data/columnar"))
+TICKER_BUCKETS = storage_config.get("ticker_buckets", 16)
+MEMORY_MAP = storage_config.get("memory_map", True)
+
+# large time-series tables that may live in Parquet; reference tables such
+# as companies and pipeline_control always stay in SQLite
+COLUMNAR_TABLES = {"daily_prices", "features"}
+
+# written by a complete export; without it the dataset only holds the rows
+# mirrored since the backend was switched on
+EXPORT_MARKER = "_EXPORTED"
+
+_warned = set()
+
+
+def enabled(table: str) -> bool:
+    return storage_config.get("columnar", False) and table in COLUMNAR_TABLES
+
+
+def exported(table: str) -> bool:
+    return os.path.isfile(os.path.join(STORE_PATH, table, EXPORT_MARKER))
+
+
+def _mark_exported(table: str, rows: int):
+
+    os.makedirs(os.path.join(STORE_PATH, table), exist_ok=True)
+
+    with open(os.path.join(STORE_PATH, table, EXPORT_MARKER), "w") as f:
+        f.write(f"{pd.Timestamp.now('UTC').isoformat()} {rows}\n")
+
+
+def _bucket(tickers) -> np.ndarray:
+    return np.array(
+        [zlib.crc32(t.encode()) % TICKER_BUCKETS for t in tickers],
+        dtype=np.int32
+    )
+
+
+def _filesystem():
+    import pyarrow.fs as pafs
+
+    return pafs.LocalFileSystem(use_mmap=MEMORY_MAP)
+
+
+def _dataset(table: str):
+    import pyarrow.dataset as ds
+
+    path = os.path.join(STORE_PATH, table)
+
+    if not os.path.isdir(path):
+        return None
+
+    return ds.dataset(
+        path,
+        format="parquet",
+        partitioning="hive",
+        filesystem=_filesystem()
+    )
+
+
+def write(table: str, df, replace=False):
+    """
+    Upserts `df` into the table's Parquet dataset, partitioned by
+    year=YYYY/bucket=N (N = crc32(ticker) % ticker_buckets). Only the
+    partitions `df` touches are rewritten. With `replace`, `df` is the
+    whole table and the dataset is marked exported.
+    """
+
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    path = os.path.join(STORE_PATH, table)
+
+    if replace and os.path.isdir(path):
+        shutil.rmtree(path)
+
+    if df.empty:
+        if replace:
+            _mark_exported(table, 0)
+        return
+
+    keys = [c.name for c in metadata.tables[table].primary_key.columns]
+
+    df = normalize_dates(df)
+    df = df.assign(year=df["date"].str[:4].astype(int), bucket=_bucket(df["ticker"]))
+
+    existing = None if replace else _dataset(table)
+
+    # ---------- merge with the stored rows of the touched partitions ----------
+    if existing is not None:
+        touched = df[["year", "bucket"]].drop_duplicates()
+
+        stored = existing.to_table(
+            filter=ds.field("year").isin(touched["year"].unique().tolist())
+            & ds.field("bucket").isin(touched["bucket"].unique().tolist())
+        ).to_pandas()
+
+        stored = stored.merge(touched, on=["year", "bucket"])
+
+        df = (
+            pd.concat([stored, df], ignore_index=True)
+            .drop_duplicates(subset=keys, keep="last")
+        )
+
+    df = df.sort_values(["ticker", "date"])
+
+    ds.write_dataset(
+        pa.Table.from_pandas(df, preserve_index=False),
+        path,
+        format="parquet",
+        partitioning=["year", "bucket"],
+        partitioning_flavor="hive",
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="delete_matching",
+        filesystem=_filesystem()
+    )
+
+    if replace:
+        _mark_exported(table, len(df))
+
+
+def read(table: str, columns=None, start=None, end=None, tickers=None) -> pd.DataFrame:
+    """
+    Reads the Parquet dataset with column projection and date / ticker
+    predicates pushed down to partition pruning and row-group statistics.
+    """
+
+    import pyarrow.dataset as ds
+
+    dataset = _dataset(table)
+
+    if dataset is None or not dataset.files:
+        return pd.DataFrame(columns=columns)
+
+    predicate = None
+
+    def both(a, b):
+        return b if a is None else a & b
+
+    if start is not None:
+        start = pd.Timestamp(start).strftime("%Y-%m-%d")
+        predicate = both(predicate, (ds.field("year") >= int(start[:4])) & (ds.field("date") >= start))
+
+    if end is not None:
+        end = pd.Timestamp(end).strftime("%Y-%m-%d")
+        predicate = both(predicate, (ds.field("year") <= int(end[:4])) & (ds.field("date") <= end))
+
+    if tickers is not None:
+        predicate = both(
+            predicate,
+            ds.field("bucket").isin(np.unique(_bucket(tickers)).tolist())
+            & ds.field("ticker").isin(list(tickers))
+        )
+
+    if columns is None:
+        columns = [c for c in dataset.schema.names if c not in ("year", "bucket")]
+
+    return dataset.to_table(columns=list(columns), filter=predicate).to_pandas()
+
+
+def read_table(table: str, columns=None, start=None, end=None) -> pd.DataFrame:
+    """
+    Reads a time-series table from Parquet when the columnar backend is
+    enabled for it and the table has been exported, otherwise from SQLite
+    with the same projection and date range.
+    """
+
+    if enabled(table):
+
+        if exported(table):
+            return read(table, columns=columns, start=start, end=end)
+
+        if table not in _warned:
+            _warned.add(table)
+            print(f"{table} not exported to Parquet yet - reading SQLite "
+                  f"(run python -m database.columnar_store {table})")
+
+    column_list = "*" if columns is None else ", ".join(f'"{c}"' for c in columns)
+
+    where = []
+    params = {}
+
+    if start is not None:
+        where.append("date >= :start")
+        params["start"] = pd.Timestamp(start).strftime("%Y-%m-%d")
+
+    if end is not None:
+        where.append("date <= :end")
+        params["end"] = pd.Timestamp(end).strftime("%Y-%m-%d")
+
+    query = f"SELECT {column_list} FROM {table}"
+
+    if where:
+        query += " WHERE " + " AND ".join(where)
+
+    return pd.read_sql(text(query), engine, params=params)
+
+
+def mirror(table: str, df, replace=False):
+    """
+    Copies rows just written to SQLite into Parquet when enabled.
+    """
+
+    if enabled(table):
+        write(table, df, replace=replace)
+
+
+def sync_from_sqlite(table: str):
+
+    print(f"Exporting {table} to Parquet...")
+
+    df = pd.read_sql(f"SELECT * FROM {table}", engine)
+
+    write(table, df, replace=True)
+
+    print(f"{len(df):,} rows written to {os.path.join(STORE_PATH, table)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export SQLite tables to Parquet")
+    parser.add_argument("tables", nargs="*",
+                        help="tables to export (default: all columnar tables)")
+    args = parser.parse_args()
+
+    for name in (args.tables or sorted(COLUMNAR_TABLES)):
+        sync_from_sqlite(name)
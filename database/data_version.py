@@ -0,0 +1,32 @@
+import os
+import time
+from database.db_connection import DB_PATH
+
+
+# Stamp file next to the database, rewritten whenever a pipeline run
+# finishes. Readers key their caches on it instead of a wall-clock TTL.
+VERSION_PATH = f"{DB_PATH}.version"
+
+
+def bump() -> str:
+
+    version = str(time.time_ns())
+
+    tmp_path = f"{VERSION_PATH}.tmp"
+
+    with open(tmp_path, "w") as f:
+        f.write(version)
+
+    os.replace(tmp_path, VERSION_PATH)
+
+    return version
+
+
+def current() -> str:
+
+    try:
+        with open(VERSION_PATH) as f:
+            return f.read().strip()
+
+    except FileNotFoundError:
+        return "0"
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 import yaml
 import os
 
@@ -10,4 +10,35 @@ with open(config_path, "r") as f:
 
 DB_NAME = config["database"]["name"]
 
-engine = create_engine(f"sqlite:///{DB_NAME}", echo=False)
+# resolved against the project root so every entry point (pipelines,
+# dashboard, background jobs) opens the same file regardless of cwd;
+# VESIGN_DB points a process at another database
+DB_PATH = os.environ.get("VESIGN_DB") or os.path.join(BASE_DIR, DB_NAME)
+
+PRAGMAS = {
+    "temp_store": "MEMORY",
+    "busy_timeout": 30000,   # ms to wait on a concurrent writer
+    **config["database"].get("pragmas", {})
+}
+
+def make_engine(db_path):
+    """
+    Creates a SQLite engine for `db_path` with the configured pragmas.
+    """
+
+    new_engine = create_engine(f"sqlite:///{db_path}", echo=False)
+
+    @event.listens_for(new_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+
+        cursor = dbapi_connection.cursor()
+
+        for name, value in PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+        cursor.close()
+
+    return new_engine
+
+
+engine = make_engine(DB_PATH)
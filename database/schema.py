@@ -0,0 +1,606 @@
+import pandas as pd
+from sqlalchemy import (
+    MetaData, Table, Column, Index, PrimaryKeyConstraint,
+    String, Float, Integer, BigInteger, Boolean, text, inspect
+)
+from database.db_connection import config, engine
+
+
+# Dates are stored as ISO "YYYY-MM-DD" text: it sorts chronologically, so
+# equality and range predicates on `date` can use the (ticker, date) keys.
+DATE_FORMAT = "%Y-%m-%d"
+
+DATE_COLUMNS = {
+    "date", "buy_date", "sell_date", "last_date",
+    "start_date", "end_date", "snapshot_date",
+    "train_start", "train_end", "test_start", "test_end"
+}
+
+model_config = config.get("model", {})
+
+# feature columns the factor models regress forward returns on
+MODEL_FACTORS = model_config.get(
+    "factors", ["rsi_factor", "bb_factor", "macd_factor", "trend_factor"]
+)
+
+# factor_weights column prefix -> trading-day horizon it is trained on
+WEIGHT_HORIZONS = model_config.get("weight_horizons", {"short": 5, "med": 20})
+
+# trading-day horizons of the stored forward returns
+FORWARD_HORIZONS = sorted(
+    set(model_config.get("horizons", [5, 20])) | set(WEIGHT_HORIZONS.values())
+)
+
+metadata = MetaData()
+
+
+def Date(name, **kwargs):
+    return Column(name, String(10), **kwargs)
+
+
+def price_columns():
+    return [
+        Date("date", nullable=False),
+        Column("ticker", String, nullable=False),
+        Column("open", Float),
+        Column("high", Float),
+        Column("low", Float),
+        Column("close", Float),
+        Column("Adj Close", Float),
+        Column("volume", BigInteger),
+    ]
+
+
+def feature_columns():
+    return price_columns() + [
+        Column("rsi", Float),
+        Column("bb_high", Float),
+        Column("bb_low", Float),
+        Column("macd", Float),
+        Column("rsi_factor", Float),
+        Column("bb_factor", Float),
+        Column("macd_factor", Float),
+        Column("trend_factor", Float),
+    ]
+
+
+def weight_columns():
+    return [
+        Column(f"{prefix}_{factor}", Float)
+        for prefix in WEIGHT_HORIZONS
+        for factor in MODEL_FACTORS
+    ]
+
+
+def statistic_pairs():
+    """
+    (column, term, term) for the upper triangle of the Gram matrix of
+    [1, factors..., y]: n, sum_{a}, sum_{a}_{b}, sum_y, sum_{a}_y, sum_y_y.
+    """
+
+    terms = ["1", *MODEL_FACTORS, "y"]
+    pairs = []
+
+    for i, a in enumerate(terms):
+        for j in range(i, len(terms)):
+            b = terms[j]
+
+            if a == "1":
+                name = "n" if b == "1" else f"sum_{b}"
+            else:
+                name = f"sum_{a}_{b}"
+
+            pairs.append((name, i, j))
+
+    return pairs
+
+
+def signal_columns():
+    return feature_columns() + [
+        Column("target_mean_price", Float),
+        Column("target_high_price", Float),
+        Column("target_low_price", Float),
+        Column("number_of_analysts", Float),
+        Column("last_update", String),
+        Column("fair_value_upside", Float),
+        Column("analyst_condition", Boolean),
+        Column("bb_ratio", Float),
+        Column("bb_condition", Boolean),
+        Column("rsi_below_30", Boolean),
+        Column("rsi_3day_flag", Float),
+        Column("signal", String),
+        Column("score", Float),
+    ]
+
+
+# ---------- Market data ----------
+daily_prices = Table(
+    "daily_prices", metadata,
+    *price_columns(),
+    PrimaryKeyConstraint("ticker", "date"),
+    Index("ix_daily_prices_date", "date", "ticker", "close"),
+)
+
+companies = Table(
+    "companies", metadata,
+    Column("ticker", String, primary_key=True),
+    Column("company", String),
+    Column("sector", String),
+    Column("website", String),
+    Column("domain", String),
+    Column("logo_url", String),
+)
+
+fundamentals = Table(
+    "fundamentals", metadata,
+    Column("ticker", String, primary_key=True),
+    Column("market_cap", Float),
+)
+
+analyst_expectations = Table(
+    "analyst_expectations", metadata,
+    Column("ticker", String, primary_key=True),
+    Column("target_mean_price", Float),
+    Column("target_high_price", Float),
+    Column("target_low_price", Float),
+    Column("number_of_analysts", Float),
+    Column("last_update", String),
+)
+
+universe_snapshots = Table(
+    "universe_snapshots", metadata,
+    Date("snapshot_date", primary_key=True),
+    Column("membership_hash", String),
+    Column("source_hash", String),
+    Column("n_tickers", Integer),
+    Column("added", Integer),
+    Column("removed", Integer),
+    Column("renamed", Integer),
+)
+
+universe_membership = Table(
+    "universe_membership", metadata,
+    Column("ticker", String, nullable=False),
+    Column("company", String),
+    Date("start_date", nullable=False),
+    Date("end_date"),
+    Column("renamed_to", String),
+    PrimaryKeyConstraint("ticker", "start_date"),
+)
+
+# ---------- Features & models ----------
+features = Table(
+    "features", metadata,
+    *feature_columns(),
+    PrimaryKeyConstraint("ticker", "date"),
+    Index("ix_features_date", "date"),
+)
+
+forward_returns = Table(
+    "forward_returns", metadata,
+    Date("date", nullable=False),
+    Column("ticker", String, nullable=False),
+    Column("close", Float),
+    *[Column(f"fwd_{h}d", Float) for h in FORWARD_HORIZONS],
+    PrimaryKeyConstraint("ticker", "date"),
+    Index("ix_forward_returns_date", "date"),
+)
+
+factor_weights = Table(
+    "factor_weights", metadata,
+    Column("trained_at", String, primary_key=True),
+    *weight_columns(),
+)
+
+# per-date sufficient statistics of the factor regressions, one row per
+# (date, horizon); a training window is the sum of its dates' rows
+factor_stats = Table(
+    "factor_stats", metadata,
+    Date("date", nullable=False),
+    Column("horizon", Integer, nullable=False),
+    *[Column(name, Float) for name, _, _ in statistic_pairs()],
+    PrimaryKeyConstraint("horizon", "date"),
+)
+
+# weights as they would have been trained on each date, per window length
+walk_forward_weights = Table(
+    "walk_forward_weights", metadata,
+    Date("date", nullable=False),
+    Column("window_days", Integer, nullable=False),
+    *weight_columns(),
+    *[Column(f"{prefix}_samples", Integer) for prefix in WEIGHT_HORIZONS],
+    PrimaryKeyConstraint("window_days", "date"),
+)
+
+# out-of-sample scores of walk-forward cross-validation, per run, factor
+# set (comma-separated), fold and horizon
+cv_results = Table(
+    "cv_results", metadata,
+    Column("run_at", String, nullable=False),
+    Column("factor_set", String, nullable=False),
+    Column("fold", Integer, nullable=False),
+    Column("horizon", Integer, nullable=False),
+    Date("train_start"),
+    Date("train_end"),
+    Date("test_start"),
+    Date("test_end"),
+    Column("train_samples", Integer),
+    Column("test_samples", Integer),
+    Column("r2", Float),
+    Column("ic", Float),
+    Column("hit_rate", Float),
+    PrimaryKeyConstraint("run_at", "factor_set", "fold", "horizon"),
+)
+
+predictions = Table(
+    "predictions", metadata,
+    Date("date", nullable=False),
+    Column("ticker", String, nullable=False),
+    *[Column(f"pred_{h}d", Float) for h in sorted(set(WEIGHT_HORIZONS.values()))],
+    Column("prediction_score", Float),
+    Column("weights_version", String),
+    PrimaryKeyConstraint("ticker", "date"),
+    Index("ix_predictions_date", "date"),
+)
+
+signals = Table(
+    "signals", metadata,
+    *signal_columns(),
+    PrimaryKeyConstraint("ticker", "date"),
+    Index("ix_signals_date_signal", "date", "signal", "ticker"),
+)
+
+# ---------- Trades, ranking, portfolio ----------
+trade_log = Table(
+    "trade_log", metadata,
+    Column("ticker", String, nullable=False),
+    Date("buy_date", nullable=False),
+    Column("buy_price", Float),
+    Date("sell_date"),
+    Column("sell_price", Float),
+    Column("return_pct", Float),
+    PrimaryKeyConstraint("ticker", "buy_date"),
+)
+
+trade_state = Table(
+    "trade_state", metadata,
+    Column("ticker", String, primary_key=True),
+    Date("last_date"),
+    Date("buy_date"),
+    Column("buy_price", Float),
+)
+
+# top BUY candidates per date; (date, ticker) keys make a day's ranking
+# an index range. weights_version is the predictions' version it was
+# ranked under
+daily_ranked = Table(
+    "daily_ranked", metadata,
+    *signal_columns(),
+    Column("rank", Float),
+    Column("prediction_score", Float),
+    Column("rank_score", Float),
+    Column("weights_version", String),
+    PrimaryKeyConstraint("date", "ticker"),
+)
+
+daily_portfolio = Table(
+    "daily_portfolio", metadata,
+    *signal_columns(),
+    Column("rank", Float),
+    Column("sector", String),
+    Column("allocation_pct", Float),
+    Column("prediction_score", Float),
+    Column("rank_score", Float),
+    Column("weights_version", String),
+    PrimaryKeyConstraint("date", "ticker"),
+)
+
+# equity curve of the latest backtest, one row per trading day
+backtest_results = Table(
+    "backtest_results", metadata,
+    Date("date", primary_key=True),
+    Column("positions", Integer),
+    Column("exposure", Float),
+    Column("turnover", Float),
+    Column("costs", Float),
+    Column("gross_return", Float),
+    Column("net_return", Float),
+    Column("equity", Float),
+    Column("drawdown", Float),
+)
+
+backtest_summary = Table(
+    "backtest_summary", metadata,
+    Column("run_at", String, primary_key=True),
+    Date("start_date"),
+    Date("end_date"),
+    Column("weighting", String),
+    Column("max_holding_days", Integer),
+    Column("commission_bps", Float),
+    Column("slippage_bps", Float),
+    Column("total_return", Float),
+    Column("cagr", Float),
+    Column("volatility", Float),
+    Column("sharpe", Float),
+    Column("max_drawdown", Float),
+    Column("annual_turnover", Float),
+    Column("trades", Integer),
+    Column("win_rate", Float),
+    Column("avg_holding_days", Float),
+)
+
+# one row per threshold combination of a threshold_sweep run
+sweep_results = Table(
+    "sweep_results", metadata,
+    Column("run_at", String, nullable=False),
+    Column("rsi_buy", Float, nullable=False),
+    Column("rsi_buy_days", Integer, nullable=False),
+    Column("bb_ratio_min", Float, nullable=False),
+    Column("upside_min", Float, nullable=False),
+    Column("rsi_sell", Float, nullable=False),
+    Column("trades", Integer),
+    Column("hit_rate", Float),
+    Column("avg_return", Float),
+    Column("total_return", Float),
+    Column("sharpe", Float),
+    Column("max_drawdown", Float),
+    PrimaryKeyConstraint(
+        "run_at", "rsi_buy", "rsi_buy_days", "bb_ratio_min", "upside_min", "rsi_sell"
+    ),
+)
+
+# ---------- Analytics ----------
+signal_success_metrics = Table(
+    "signal_success_metrics", metadata,
+    Column("success_rate", Float),
+    Column("avg_return", Float),
+    Column("num_trades", Integer),
+)
+
+signal_trades = Table(
+    "signal_trades", metadata,
+    Column("ticker", String, nullable=False),
+    Date("buy_date", nullable=False),
+    Date("sell_date"),
+    Column("return", Float),
+    PrimaryKeyConstraint("ticker", "buy_date"),
+)
+
+signal_success_by_company = Table(
+    "signal_success_by_company", metadata,
+    Column("ticker", String, primary_key=True),
+    Column("trades", Integer),
+    Column("success_rate", Float),
+    Column("avg_return", Float),
+)
+
+# ---------- Control ----------
+pipeline_control = Table(
+    "pipeline_control", metadata,
+    Column("job_name", String, primary_key=True),
+    Column("last_run", String),
+)
+
+pipeline_runs = Table(
+    "pipeline_runs", metadata,
+    Column("run_id", String, nullable=False),
+    Column("pipeline", String),
+    Column("stage", String, nullable=False),
+    Column("started_at", String),
+    Column("status", String),
+    Column("wall_seconds", Float),
+    Column("cpu_seconds", Float),
+    Column("peak_rss_mb", Float),       # process high-water mark at stage end
+    Column("rows_read", BigInteger),
+    Column("rows_written", BigInteger),
+    Column("sql_seconds", Float),
+    Column("sql_statements", Integer),
+    PrimaryKeyConstraint("run_id", "stage"),
+    Index("ix_pipeline_runs_stage", "pipeline", "stage", "run_id"),
+)
+
+schema_version = Table(
+    "schema_version", metadata,
+    Column("version", Integer, primary_key=True),
+    Column("applied_at", String),
+)
+
+
+def normalize_dates(df):
+    """
+    Converts the frame's date columns to the stored "YYYY-MM-DD" text form.
+    """
+
+    return df.assign(**{
+        col: pd.to_datetime(df[col]).dt.strftime(DATE_FORMAT)
+        for col in DATE_COLUMNS.intersection(df.columns)
+    })
+
+
+# ---------- Migrations ----------
+def rebuild_table(conn, table, date_columns=DATE_COLUMNS, backfill=None):
+    """
+    Recreates `table` from its declaration and copies the old rows across,
+    normalizing dates. Later duplicates of a key replace earlier ones.
+    `backfill` gives a value for declared NOT NULL columns the old table
+    lacks; rows with a missing key are dropped.
+    """
+
+    backfill = backfill or {}
+    old_name = f"{table.name}__old"
+
+    old_columns = [c["name"] for c in inspect(conn).get_columns(table.name)]
+    shared = [c.name for c in table.columns if c.name in old_columns]
+    filled = [c.name for c in table.columns if c.name not in old_columns and c.name in backfill]
+
+    unfillable = [
+        c.name for c in table.columns
+        if not c.nullable and c.name not in old_columns and c.name not in backfill
+    ]
+    if unfillable:
+        raise ValueError(f"{table.name} has no source for NOT NULL columns {unfillable}")
+
+    conn.exec_driver_sql(f'ALTER TABLE "{table.name}" RENAME TO "{old_name}"')
+
+    table.create(conn)
+
+    select_list = ", ".join(
+        [f'substr("{c}", 1, 10)' if c in date_columns else f'"{c}"' for c in shared]
+        + [f":{c}" for c in filled]
+    )
+    column_list = ", ".join(f'"{c}"' for c in shared + filled)
+
+    keys = [c.name for c in table.primary_key.columns if c.name in shared]
+    where = " AND ".join(f'"{c}" IS NOT NULL' for c in keys) or "true"
+
+    conn.execute(
+        text(f"""
+            INSERT OR REPLACE INTO "{table.name}" ({column_list})
+            SELECT {select_list} FROM "{old_name}" WHERE {where} ORDER BY rowid
+        """),
+        {c: backfill[c] for c in filled}
+    )
+
+    conn.exec_driver_sql(f'DROP TABLE "{old_name}"')
+
+
+def restore_interrupted_rebuilds(conn):
+    """
+    Repairs a rebuild_table that was cut short outside a transaction: a
+    leftover "<table>__old" is put back unless its copy had completed.
+    """
+
+    existing = set(inspect(conn).get_table_names())
+
+    for old_name in sorted(name for name in existing if name.endswith("__old")):
+
+        name = old_name[:-len("__old")]
+
+        if name in existing:
+            copied = conn.exec_driver_sql(f'SELECT 1 FROM "{name}" LIMIT 1').first()
+
+            if copied is not None:
+                print(f"Dropping leftover {old_name}")
+                conn.exec_driver_sql(f'DROP TABLE "{old_name}"')
+                continue
+
+            conn.exec_driver_sql(f'DROP TABLE "{name}"')
+
+        print(f"Restoring {name} from {old_name}")
+        conn.exec_driver_sql(f'ALTER TABLE "{old_name}" RENAME TO "{name}"')
+
+
+def migrate_v1(conn):
+    """
+    Typed tables with composite keys and indexes for databases created by
+    DataFrame.to_sql, as version 1 declared them (database/schema_v1.py).
+    """
+
+    from database import schema_v1
+
+    existing = set(inspect(conn).get_table_names())
+
+    # to_sql wrote factor_weights without a version column; its single row
+    # becomes the version trained "now"
+    backfill = {"trained_at": pd.Timestamp.now("UTC").isoformat()}
+
+    for table in schema_v1.metadata.sorted_tables:
+        if table.name in existing and table.name != "schema_version":
+            print(f"Migrating {table.name}...")
+            rebuild_table(conn, table, schema_v1.DATE_COLUMNS, backfill)
+
+
+def migrate_v2(conn):
+    """
+    backtest_results becomes a per-date equity curve; the old per-ticker
+    rows are derived data and are dropped rather than converted. The new
+    table is created with the other missing tables.
+    """
+
+    conn.exec_driver_sql("DROP TABLE IF EXISTS backtest_results")
+
+
+MIGRATIONS = [
+    (1, migrate_v1),
+    (2, migrate_v2),
+]
+
+
+def add_missing_columns(conn):
+    """
+    Adds declared nullable columns that an existing table lacks, e.g. new
+    forward-return horizons from the config. Columns are never dropped.
+    """
+
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+
+    for table in metadata.sorted_tables:
+
+        if table.name not in existing_tables:
+            continue
+
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+
+        for column in table.columns:
+            if column.name not in existing and column.nullable and not column.primary_key:
+                print(f"Adding {table.name}.{column.name}")
+                conn.exec_driver_sql(
+                    f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" '
+                    f'{column.type.compile(dialect=conn.dialect)}'
+                )
+
+
+def current_version(conn) -> int:
+
+    if not inspect(conn).has_table("schema_version"):
+        return 0
+
+    return conn.execute(
+        text("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    ).scalar()
+
+
+def init_schema(target=None):
+    """
+    Applies pending migrations, then creates any missing tables and indexes,
+    all in one transaction.
+    """
+
+    with (target or engine).connect() as conn:
+
+        # pysqlite only opens a transaction before DML, so the RENAME and
+        # CREATE of a table rebuild would commit on their own; with the
+        # driver's transaction handling off, an explicit BEGIN covers them
+        dbapi_connection = conn.connection.dbapi_connection
+        isolation_level = dbapi_connection.isolation_level
+        dbapi_connection.isolation_level = None
+
+        try:
+            with conn.begin():
+                conn.exec_driver_sql("BEGIN")
+
+                restore_interrupted_rebuilds(conn)
+
+                version = current_version(conn)
+
+                schema_version.create(conn, checkfirst=True)
+
+                for number, migration in MIGRATIONS:
+                    if number > version:
+                        migration(conn)
+                        conn.execute(
+                            schema_version.insert(),
+                            {"version": number, "applied_at": pd.Timestamp.now("UTC").isoformat()}
+                        )
+
+                add_missing_columns(conn)
+                metadata.create_all(conn)
+
+        finally:
+            dbapi_connection.isolation_level = isolation_level
+
+
+if __name__ == "__main__":
+    init_schema()
+    print("Schema up to date")
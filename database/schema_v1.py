@@ -0,0 +1,255 @@
+from sqlalchemy import (
+    MetaData, Table, Column, Index, PrimaryKeyConstraint,
+    String, Float, Integer, BigInteger, Boolean
+)
+
+
+# Frozen copy of the tables as schema version 1 declared them. migrate_v1
+# rebuilds against these, not the live metadata, so the migration does the
+# same thing whichever later version of the code runs it; later changes
+# are applied on top by their own migrations and add_missing_columns.
+# Do not edit.
+
+DATE_COLUMNS = {
+    "date", "buy_date", "sell_date", "last_date",
+    "start_date", "end_date", "snapshot_date"
+}
+
+metadata = MetaData()
+
+
+def Date(name, **kwargs):
+    return Column(name, String(10), **kwargs)
+
+
+def price_columns():
+    return [
+        Date("date", nullable=False),
+        Column("ticker", String, nullable=False),
+        Column("open", Float),
+        Column("high", Float),
+        Column("low", Float),
+        Column("close", Float),
+        Column("Adj Close", Float),
+        Column("volume", BigInteger),
+    ]
+
+
+def feature_columns():
+    return price_columns() + [
+        Column("rsi", Float),
+        Column("bb_high", Float),
+        Column("bb_low", Float),
+        Column("macd", Float),
+        Column("rsi_factor", Float),
+        Column("bb_factor", Float),
+        Column("macd_factor", Float),
+        Column("trend_factor", Float),
+    ]
+
+
+def signal_columns():
+    return feature_columns() + [
+        Column("target_mean_price", Float),
+        Column("target_high_price", Float),
+        Column("target_low_price", Float),
+        Column("number_of_analysts", Float),
+        Column("last_update", String),
+        Column("fair_value_upside", Float),
+        Column("analyst_condition", Boolean),
+        Column("bb_ratio", Float),
+        Column("bb_condition", Boolean),
+        Column("rsi_below_30", Boolean),
+        Column("rsi_3day_flag", Float),
+        Column("signal", String),
+        Column("score", Float),
+    ]
+
+
+# ---------- Market data ----------
+daily_prices = Table(
+    "daily_prices", metadata,
+    *price_columns(),
+    PrimaryKeyConstraint("ticker", "date"),
+    Index("ix_daily_prices_date", "date", "ticker", "close"),
+)
+
+companies = Table(
+    "companies", metadata,
+    Column("ticker", String, primary_key=True),
+    Column("company", String),
+    Column("sector", String),
+    Column("website", String),
+    Column("domain", String),
+    Column("logo_url", String),
+)
+
+fundamentals = Table(
+    "fundamentals", metadata,
+    Column("ticker", String, primary_key=True),
+    Column("market_cap", Float),
+)
+
+analyst_expectations = Table(
+    "analyst_expectations", metadata,
+    Column("ticker", String, primary_key=True),
+    Column("target_mean_price", Float),
+    Column("target_high_price", Float),
+    Column("target_low_price", Float),
+    Column("number_of_analysts", Float),
+    Column("last_update", String),
+)
+
+universe_snapshots = Table(
+    "universe_snapshots", metadata,
+    Date("snapshot_date", primary_key=True),
+    Column("membership_hash", String),
+    Column("source_hash", String),
+    Column("n_tickers", Integer),
+    Column("added", Integer),
+    Column("removed", Integer),
+    Column("renamed", Integer),
+)
+
+universe_membership = Table(
+    "universe_membership", metadata,
+    Column("ticker", String, nullable=False),
+    Column("company", String),
+    Date("start_date", nullable=False),
+    Date("end_date"),
+    Column("renamed_to", String),
+    PrimaryKeyConstraint("ticker", "start_date"),
+)
+
+# ---------- Features & models ----------
+features = Table(
+    "features", metadata,
+    *feature_columns(),
+    PrimaryKeyConstraint("ticker", "date"),
+    Index("ix_features_date", "date"),
+)
+
+forward_returns = Table(
+    "forward_returns", metadata,
+    Date("date", nullable=False),
+    Column("ticker", String, nullable=False),
+    Column("close", Float),
+    Column("fwd_5d", Float),
+    Column("fwd_20d", Float),
+    PrimaryKeyConstraint("ticker", "date"),
+    Index("ix_forward_returns_date", "date"),
+)
+
+factor_weights = Table(
+    "factor_weights", metadata,
+    Column("trained_at", String, primary_key=True),
+    *[
+        Column(f"{horizon}_{factor}", Float)
+        for horizon in ("short", "med")
+        for factor in ("rsi_factor", "bb_factor", "macd_factor", "trend_factor")
+    ],
+)
+
+predictions = Table(
+    "predictions", metadata,
+    Date("date", nullable=False),
+    Column("ticker", String, nullable=False),
+    Column("pred_5d", Float),
+    Column("pred_20d", Float),
+    Column("prediction_score", Float),
+    PrimaryKeyConstraint("ticker", "date"),
+    Index("ix_predictions_date", "date"),
+)
+
+signals = Table(
+    "signals", metadata,
+    *signal_columns(),
+    PrimaryKeyConstraint("ticker", "date"),
+    Index("ix_signals_date_signal", "date", "signal", "ticker"),
+)
+
+# ---------- Trades, ranking, portfolio ----------
+trade_log = Table(
+    "trade_log", metadata,
+    Column("ticker", String, nullable=False),
+    Date("buy_date", nullable=False),
+    Column("buy_price", Float),
+    Date("sell_date"),
+    Column("sell_price", Float),
+    Column("return_pct", Float),
+    PrimaryKeyConstraint("ticker", "buy_date"),
+)
+
+trade_state = Table(
+    "trade_state", metadata,
+    Column("ticker", String, primary_key=True),
+    Date("last_date"),
+    Date("buy_date"),
+    Column("buy_price", Float),
+)
+
+daily_ranked = Table(
+    "daily_ranked", metadata,
+    *signal_columns(),
+    Column("rank", Float),
+    PrimaryKeyConstraint("date", "ticker"),
+)
+
+daily_portfolio = Table(
+    "daily_portfolio", metadata,
+    *signal_columns(),
+    Column("rank", Float),
+    Column("sector", String),
+    Column("allocation_pct", Float),
+    PrimaryKeyConstraint("date", "ticker"),
+)
+
+backtest_results = Table(
+    "backtest_results", metadata,
+    Date("date", nullable=False),
+    Column("ticker", String, nullable=False),
+    Column("signal", String),
+    Column("close", Float),
+    Column("next_close", Float),
+    Column("return", Float),
+    Column("strategy_return", Float),
+    PrimaryKeyConstraint("ticker", "date"),
+)
+
+# ---------- Analytics ----------
+signal_success_metrics = Table(
+    "signal_success_metrics", metadata,
+    Column("success_rate", Float),
+    Column("avg_return", Float),
+    Column("num_trades", Integer),
+)
+
+signal_trades = Table(
+    "signal_trades", metadata,
+    Column("ticker", String, nullable=False),
+    Date("buy_date", nullable=False),
+    Date("sell_date"),
+    Column("return", Float),
+    PrimaryKeyConstraint("ticker", "buy_date"),
+)
+
+signal_success_by_company = Table(
+    "signal_success_by_company", metadata,
+    Column("ticker", String, primary_key=True),
+    Column("trades", Integer),
+    Column("success_rate", Float),
+    Column("avg_return", Float),
+)
+
+# ---------- Control ----------
+pipeline_control = Table(
+    "pipeline_control", metadata,
+    Column("job_name", String, primary_key=True),
+    Column("last_run", String),
+)
+
+schema_version = Table(
+    "schema_version", metadata,
+    Column("version", Integer, primary_key=True),
+    Column("applied_at", String),
+)
@@ -0,0 +1,131 @@
+import pandas as pd
+from sqlalchemy import text
+from database.db_connection import engine
+from database.schema import metadata, normalize_dates
+
+
+CHUNK_SIZE = 50_000
+
+
+def _quote(name):
+    return f'"{name}"'
+
+
+def _rows(df):
+
+    # timestamps other than the normalized date columns are bound as ISO text
+    df = df.assign(**{
+        col: df[col].astype(str).where(df[col].notna(), None)
+        for col in df.columns
+        if pd.api.types.is_datetime64_any_dtype(df[col])
+    })
+
+    values = df.to_numpy(dtype=object)
+    values[df.isna().to_numpy()] = None
+    return [tuple(row) for row in values]
+
+
+def upsert(df, table: str, conn=None, chunk_size=CHUNK_SIZE) -> dict:
+    """
+    Writes `df` into `table` with INSERT ... ON CONFLICT DO UPDATE on the
+    table's primary key, in chunks of prepared executemany calls inside one
+    transaction; tables without a key get plain inserts. Returns
+    {"inserted": n, "updated": n}.
+    """
+
+    if conn is None:
+        with engine.begin() as conn:
+            return upsert(df, table, conn, chunk_size)
+
+    declared = metadata.tables[table]
+    declared.create(conn, checkfirst=True)
+
+    unknown = set(df.columns) - set(declared.columns.keys())
+    if unknown:
+        raise ValueError(f"{table} has no columns {sorted(unknown)}")
+
+    keys = [c.name for c in declared.primary_key.columns]
+    columns = list(df.columns)
+
+    if df.empty:
+        return {"inserted": 0, "updated": 0}
+
+    df = normalize_dates(df)
+
+    column_list = ", ".join(_quote(c) for c in columns)
+    placeholders = ", ".join("?" for _ in columns)
+
+    # without a key (e.g. signal_success_metrics) every row is a new row
+    if not keys:
+        for start in range(0, len(df), chunk_size):
+            conn.exec_driver_sql(
+                f"INSERT INTO {_quote(table)} ({column_list}) VALUES ({placeholders})",
+                _rows(df.iloc[start:start + chunk_size])
+            )
+
+        return {"inserted": len(df), "updated": 0}
+
+    df = df.drop_duplicates(subset=keys, keep="last")
+
+    key_list = ", ".join(_quote(k) for k in keys)
+    key_match = " AND ".join(f"t.{_quote(k)} = s.{_quote(k)}" for k in keys)
+
+    updates = ", ".join(
+        f"{_quote(c)} = excluded.{_quote(c)}" for c in columns if c not in keys
+    )
+    on_conflict = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+
+    # rows are staged first so existing keys can be counted before the upsert
+    conn.exec_driver_sql("DROP TABLE IF EXISTS temp._upsert_stage")
+    conn.exec_driver_sql(
+        f"CREATE TEMP TABLE _upsert_stage AS "
+        f"SELECT {column_list} FROM {_quote(table)} WHERE 0"
+    )
+
+    inserted = updated = 0
+
+    for start in range(0, len(df), chunk_size):
+
+        chunk = df.iloc[start:start + chunk_size]
+
+        conn.exec_driver_sql(
+            f"INSERT INTO _upsert_stage ({column_list}) VALUES ({placeholders})",
+            _rows(chunk)
+        )
+
+        existing = conn.exec_driver_sql(
+            f"SELECT COUNT(*) FROM _upsert_stage s "
+            f"JOIN {_quote(table)} t ON {key_match}"
+        ).scalar()
+
+        conn.exec_driver_sql(
+            f"INSERT INTO {_quote(table)} ({column_list}) "
+            f"SELECT {column_list} FROM _upsert_stage WHERE true "
+            f"ON CONFLICT ({key_list}) {on_conflict}"
+        )
+
+        conn.exec_driver_sql("DELETE FROM _upsert_stage")
+
+        updated += existing
+        inserted += len(chunk) - existing
+
+    conn.exec_driver_sql("DROP TABLE temp._upsert_stage")
+
+    return {"inserted": inserted, "updated": updated}
+
+
+def replace_rows(df, table: str, conn=None) -> dict:
+    """
+    Replaces the contents of `table` with `df` while keeping the declared
+    schema (keys, types, indexes) that `to_sql(if_exists="replace")` drops.
+    """
+
+    if conn is None:
+        with engine.begin() as conn:
+            return replace_rows(df, table, conn)
+
+    metadata.tables[table].create(conn, checkfirst=True)
+
+    conn.execute(text(f'DELETE FROM "{table}"'))
+
+    return upsert(df, table, conn)
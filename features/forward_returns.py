@@ -1,19 +1,88 @@
+import argparse
+import numpy as np
 import pandas as pd
+from sqlalchemy import inspect
 from database.db_connection import engine
+from database.schema import FORWARD_HORIZONS
+from database.writer import upsert, replace_rows
+from database.columnar_store import read_table
+from utils.incremental import load_with_lookback
 
 
-def compute_forward_returns():
+def add_forward_returns(prices, horizons=FORWARD_HORIZONS) -> pd.DataFrame:
+    """
+    Adds fwd_{h}d = close[t + h] / close[t] - 1 per ticker for every
+    horizon, in one pass over (ticker, date)-sorted arrays.
+    """
 
-    prices = pd.read_sql("SELECT date,ticker,close FROM daily_prices", engine)
+    df = prices.sort_values(["ticker", "date"]).reset_index(drop=True)
 
-    prices = prices.sort_values(["ticker", "date"])
+    close = df["close"].to_numpy(dtype=float)
+    ticker, _ = pd.factorize(df["ticker"])
 
-    prices["fwd_5d"] = (
-        prices.groupby("ticker")["close"].shift(-5) / prices["close"] - 1
-    )
+    for h in horizons:
+        future = np.full(len(df), np.nan)
 
-    prices["fwd_20d"] = (
-        prices.groupby("ticker")["close"].shift(-20) / prices["close"] - 1
-    )
+        if h < len(df):
+            same_ticker = ticker[h:] == ticker[:-h]
+            future[:-h] = np.where(same_ticker, close[h:], np.nan)
 
-    prices.to_sql("forward_returns", engine, if_exists="replace", index=False)
+        df[f"fwd_{h}d"] = future / close - 1
+
+    return df
+
+
+def needs_full_rebuild() -> bool:
+
+    if "forward_returns" not in inspect(engine).get_table_names():
+        return True
+
+    with engine.connect() as conn:
+
+        if conn.exec_driver_sql("SELECT 1 FROM forward_returns LIMIT 1").first() is None:
+            return True
+
+        # a horizon added to the config has no values for the stored history
+        return any(
+            conn.exec_driver_sql(
+                f"SELECT 1 FROM forward_returns WHERE fwd_{h}d IS NOT NULL LIMIT 1"
+            ).first() is None
+            for h in FORWARD_HORIZONS
+        )
+
+
+def compute_forward_returns(full=False):
+
+    print(f"Computing forward returns ({', '.join(f'{h}d' for h in FORWARD_HORIZONS)})...")
+
+    full = full or needs_full_rebuild()
+
+    columns = ["date", "ticker", "close"] + [f"fwd_{h}d" for h in FORWARD_HORIZONS]
+
+    if full:
+        prices = read_table("daily_prices", columns=["date", "ticker", "close"])
+
+        result = replace_rows(add_forward_returns(prices)[columns], "forward_returns")
+
+    else:
+        # new bars plus the last max(h) stored rows per ticker: the only
+        # rows whose future window can have filled since the last run
+        prices = load_with_lookback("daily_prices", "forward_returns", max(FORWARD_HORIZONS))
+
+        if prices.empty:
+            print("Forward returns already up to date")
+            return
+
+        result = upsert(add_forward_returns(prices)[columns], "forward_returns")
+
+    print(f"Forward returns updated "
+          f"({result['inserted']:,} inserted, {result['updated']:,} updated)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute forward returns")
+    parser.add_argument("--full", action="store_true",
+                        help="recompute every row instead of the trailing windows")
+    args = parser.parse_args()
+
+    compute_forward_returns(full=args.full)
@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+
+
+# Same indicators as technical_indicators.add_indicators, computed for many
+# tickers at once. Each ticker's bars are laid out as one column of a
+# (bar position x ticker) matrix, so column-wise operations see exactly the
+# series the per-ticker `ta` calls see, NaN closes included.
+
+RSI_WINDOW = 14
+BB_WINDOW = 20
+BB_DEV = 2
+MACD_FAST = 12
+MACD_SLOW = 26
+TREND_PERIODS = 20
+
+# tickers per block, bounding memory to a few (bars x block) matrices
+TICKER_BLOCK = 1000
+
+
+def ewm_mean(x, alpha, min_periods):
+    """
+    Column-wise `Series.ewm(alpha=alpha, adjust=False).mean()` with
+    pandas' NaN rules: the mean is held through missing values and the
+    decay keeps running across them, so an observation k bars after the
+    previous one gives y = (d^k * y + alpha * x) / (d^k + alpha), with
+    d = 1 - alpha. Output starts once `min_periods` values were seen.
+
+    Every step is written as y[i] = p[i] * y[i-1] + q[i], so the loop over
+    bars is two vector operations across all tickers.
+    """
+
+    decay = 1 - alpha
+
+    valid = np.isfinite(x)
+    bar = np.arange(len(x))[:, None]
+
+    # bar of the previous observation (-1 before the first one)
+    last_seen = np.maximum.accumulate(np.where(valid, bar, -1), axis=0)
+    previous = np.vstack([np.full((1, x.shape[1]), -1), last_seen[:-1]])
+
+    weight = decay ** (bar - previous)
+    first = valid & (previous < 0)
+
+    with np.errstate(invalid="ignore"):
+        p = np.where(valid, weight / (weight + alpha), 1.0)
+        q = np.where(valid, alpha * x / (weight + alpha), 0.0)
+
+    p[first] = 0.0
+    q[first] = x[first]
+
+    out = np.empty_like(x)
+    out[0] = q[0]
+
+    for i in range(1, len(x)):
+        np.multiply(p[i], out[i - 1], out=out[i])
+        out[i] += q[i]
+
+    out[np.cumsum(valid, axis=0) < min_periods] = np.nan
+
+    return out
+
+
+def rolling_mean_std(x, window):
+    """
+    Column-wise rolling mean and population std (ddof=0); windows
+    containing a NaN give NaN like `rolling(window)`.
+    """
+
+    from numpy.lib.stride_tricks import sliding_window_view
+
+    valid = np.isfinite(x)
+
+    # centring each column keeps the sum of squares free of cancellation
+    centre = np.nanmean(np.where(valid, x, np.nan), axis=0)
+    centre = np.where(np.isfinite(centre), centre, 0)
+    z = np.where(valid, x - centre, 0)
+
+    def window_sum(a):
+        out = np.zeros_like(a)
+        out[window - 1:] = sliding_window_view(a, window, axis=0).sum(axis=-1)
+        return out
+
+    full = window_sum(valid.astype(np.int64)) == window
+    s1 = window_sum(z)
+    s2 = window_sum(z * z)
+
+    mean = s1 / window
+    var = np.maximum(s2 / window - mean * mean, 0)
+
+    return (
+        np.where(full, mean + centre, np.nan),
+        np.where(full, np.sqrt(var), np.nan)
+    )
+
+
+def shift(x, periods):
+
+    out = np.full_like(x, np.nan)
+    out[periods:] = x[:-periods]
+    return out
+
+
+def indicator_matrices(close) -> dict:
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+
+        # ---------- RSI (Wilder smoothing) ----------
+        diff = close - shift(close, 1)
+        up = np.where(diff > 0, diff, 0.0)
+        down = np.where(diff < 0, -diff, 0.0)
+
+        ema_up = ewm_mean(up, 1 / RSI_WINDOW, RSI_WINDOW)
+        ema_down = ewm_mean(down, 1 / RSI_WINDOW, RSI_WINDOW)
+
+        rsi = np.where(ema_down == 0, 100, 100 - 100 / (1 + ema_up / ema_down))
+
+        # ---------- Bollinger ----------
+        mavg, mstd = rolling_mean_std(close, BB_WINDOW)
+
+        # ---------- MACD ----------
+        macd = (
+            ewm_mean(close, 2 / (MACD_FAST + 1), MACD_FAST)
+            - ewm_mean(close, 2 / (MACD_SLOW + 1), MACD_SLOW)
+        )
+
+        return {
+            "rsi": rsi,
+            "bb_high": mavg + BB_DEV * mstd,
+            "bb_low": mavg - BB_DEV * mstd,
+            "macd": macd,
+            "trend": close / shift(close, TREND_PERIODS) - 1,
+        }
+
+
+def add_indicators_panel(prices, block=TICKER_BLOCK) -> pd.DataFrame:
+    """
+    Returns `prices` (row order kept) with the indicator and factor
+    columns of add_indicators, for every ticker in one pass.
+    """
+
+    ticker_codes, _ = pd.factorize(prices["ticker"])
+    date_codes, _ = pd.factorize(prices["date"], sort=True)
+
+    # rows grouped by ticker, each ticker's bars in date order
+    order = np.lexsort((date_codes, ticker_codes))
+    codes = ticker_codes[order]
+
+    counts = np.bincount(codes)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    # bar position of every (sorted) row within its ticker
+    position = np.arange(len(order)) - starts[codes]
+
+    close = prices["close"].to_numpy(dtype=float)[order]
+    columns = {name: np.empty(len(order)) for name in
+               ["rsi", "bb_high", "bb_low", "macd", "trend"]}
+
+    for first in range(0, len(counts), block):
+
+        last = min(first + block, len(counts))
+        rows = slice(starts[first], starts[last - 1] + counts[last - 1])
+
+        col = codes[rows] - first
+        pos = position[rows]
+
+        matrix = np.full((counts[first:last].max(), last - first), np.nan)
+        matrix[pos, col] = close[rows]
+
+        for name, values in indicator_matrices(matrix).items():
+            columns[name][order[rows]] = values[pos, col]
+
+    df = prices.assign(**columns)
+
+    # ---------- FACTORS (needed for ML training) ----------
+    df["rsi_factor"] = (50 - df["rsi"]) / 50
+    df["bb_factor"] = (df["bb_low"] - df["close"]) / df["close"]
+    df["macd_factor"] = df["macd"] / df["close"]
+
+    df["trend_factor"] = df.pop("trend")
+
+    return df
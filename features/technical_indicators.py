@@ -1,6 +1,13 @@
 import ta
 
 
+# Bars of history an incremental run must reload before the first new bar.
+# Bollinger(20) and the 20-day trend need 20 prior bars, but RSI(14) and
+# MACD(12/26) are recursive EMAs: after 400 bars the truncated history
+# weighs less than (13/14) ** 400 ~ 1e-13, so values match a full rebuild.
+WARMUP_BARS = 400
+
+
 def add_indicators(df):
 
     df["rsi"] = ta.momentum.RSIIndicator(df["close"]).rsi()
@@ -1,11 +1,17 @@
 import sys
 import os
+import argparse
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from database.schema import init_schema
+from database import data_version
+from pipelines import scheduler
+from pipelines.scheduler import Stage
+
 # ---------- Data pipelines ----------
+from utils.universe_loader import load_universe, cached_tickers
 from pipelines.daily_update import update_prices
-from pipelines.fundamentals_update import update_fundamentals
-from features.analyst_data import update_analyst_data
+from pipelines.ticker_info import update_ticker_info
 
 # ---------- Feature engineering ----------
 from pipelines.feature_pipeline import run_feature_pipeline
@@ -24,37 +30,78 @@ from risk.ranking_engine import run_ranking
 from portfolio.allocator import run_allocator
 
 
-def daily_run():
+# Each stage declares the tables it reads and writes; the scheduler derives
+# the dependencies from them and runs independent stages in parallel.
+DAILY_STAGES = [
     # data updates
-    update_prices()
-    update_fundamentals()
-    update_analyst_data()
+    Stage("universe", load_universe,
+          outputs={"companies", "universe_snapshots", "universe_membership"}),
+    Stage("prices", lambda: update_prices(cached_tickers()),
+          inputs={"companies"}, outputs={"daily_prices"}),
+    Stage("ticker_info", update_ticker_info,
+          inputs={"companies"}, outputs={"fundamentals", "analyst_expectations"}),
 
     # features
-    run_feature_pipeline()
+    Stage("features", run_feature_pipeline,
+          inputs={"daily_prices"}, outputs={"features"}),
 
     # prediction & signals
-    run_prediction_engine()
-    run_scoring()
+    Stage("predictions", run_prediction_engine,
+          inputs={"features", "factor_weights"}, outputs={"predictions"}),
+    Stage("scoring", run_scoring,
+          inputs={"features", "analyst_expectations"}, outputs={"signals"}),
 
     # trade tracking
-    build_trade_log()
+    Stage("trade_log", build_trade_log,
+          inputs={"signals"}, outputs={"trade_log", "trade_state"}),
 
     # portfolio
-    run_ranking()
-    run_allocator()
+    Stage("ranking", run_ranking,
+          inputs={"signals", "predictions"}, outputs={"daily_ranked"}),
+    Stage("allocator", run_allocator,
+          inputs={"daily_ranked", "companies"}, outputs={"daily_portfolio"}),
+]
 
+TRAINING_STAGES = [
+    Stage("forward_returns", compute_forward_returns,
+          inputs={"daily_prices"}, outputs={"forward_returns"}),
+    Stage("weights", train_factor_weights,
+          inputs={"features", "forward_returns"}, outputs={"factor_weights"}),
+    Stage("backtest", run_backtest,
+          inputs={"daily_prices", "signals"}, outputs={"backtest_results"}),
+]
 
-def training_run():
-    compute_forward_returns()
-    train_factor_weights()
-    run_backtest()
 
+def daily_run(targets=None, progress=None):
+    """
+    Runs the daily stages, or only `targets` and their upstream stages.
+    `progress(stage, step, total)` is called as each stage starts.
+    """
+
+    init_schema()
+
+    scheduler.run(DAILY_STAGES, targets=targets, progress=progress, pipeline="daily")
+
+    # readers (dashboard) refresh their caches
+    data_version.bump()
 
-if __name__ == "__main__":
-    mode = "daily"   # change to "training" when needed
 
-    if mode == "daily":
-        daily_run()
-    elif mode == "training":
-        training_run()
+def training_run(targets=None):
+    init_schema()
+
+    scheduler.run(TRAINING_STAGES, targets=targets, pipeline="training")
+
+    data_version.bump()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the Vesign pipelines")
+    parser.add_argument("mode", nargs="?", default="daily", choices=["daily", "training"])
+    parser.add_argument("--stage", action="append", dest="stages",
+                        help="run only this stage and its upstream stages (repeatable)")
+    args = parser.parse_args()
+
+    if args.mode == "daily":
+        daily_run(targets=args.stages)
+    elif args.mode == "training":
+        training_run(targets=args.stages)
@@ -0,0 +1,69 @@
+import streamlit as st
+import pandas as pd
+from sqlalchemy import inspect
+from database import data_version
+from database.db_connection import engine
+from pipelines.run_metrics import load_runs, stage_trends
+
+st.set_page_config(layout="wide")
+
+st.title("Pipeline Runs")
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def load_recent_runs(last, version):
+    return load_runs(last)
+
+
+if "pipeline_runs" not in inspect(engine).get_table_names():
+    st.info("No pipeline runs recorded yet")
+    st.stop()
+
+control_col, metric_col, _ = st.columns([2, 2, 7])
+
+with control_col:
+    last = st.number_input("Runs", min_value=2, max_value=100, value=20)
+
+with metric_col:
+    metric = st.selectbox(
+        "Metric",
+        ["wall_seconds", "cpu_seconds", "sql_seconds",
+         "rows_read", "rows_written", "peak_rss_mb"]
+    )
+
+runs = load_recent_runs(int(last), data_version.current())
+
+if runs.empty:
+    st.info("No pipeline runs recorded yet")
+    st.stop()
+
+for pipeline, df in runs.groupby("pipeline"):
+
+    st.header(pipeline.capitalize())
+
+    trends = stage_trends(df)
+    regressed = trends.loc[trends["regression"], "stage"].tolist()
+
+    if regressed:
+        st.warning(f"Slower than usual: {', '.join(regressed)}")
+
+    df = df.assign(started_at=pd.to_datetime(df.groupby("run_id")["started_at"].transform("min")))
+
+    st.line_chart(
+        df.pivot_table(index="started_at", columns="stage", values=metric),
+        height=300
+    )
+
+    st.dataframe(
+        trends.drop(columns=["pipeline", "trend"]),
+        hide_index=True,
+        width="stretch",
+        column_config={
+            "wall_s": st.column_config.NumberColumn("Wall (s)", format="%.2f"),
+            "median_s": st.column_config.NumberColumn("Median (s)", format="%.2f"),
+            "ratio": st.column_config.NumberColumn("Ratio", format="%.2f"),
+            "cpu_s": st.column_config.NumberColumn("CPU (s)", format="%.2f"),
+            "sql_s": st.column_config.NumberColumn("SQL (s)", format="%.2f"),
+            "peak_rss_mb": st.column_config.NumberColumn("Peak RSS (MB)", format="%.0f"),
+        }
+    )
@@ -0,0 +1,151 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from database.db_connection import BASE_DIR, DB_PATH
+
+
+# The first daily_run on an empty database runs as a detached process so
+# the dashboard can keep rendering; it reports progress through this file.
+PROGRESS_PATH = f"{DB_PATH}.bootstrap.json"
+LOG_PATH = f"{DB_PATH}.bootstrap.log"
+
+_lock = threading.Lock()
+
+# the job this process launched, until it writes its own progress
+_process = None
+
+
+def read_progress():
+
+    try:
+        with open(PROGRESS_PATH) as f:
+            return json.load(f)
+
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _write_progress(**state):
+
+    state["updated_at"] = time.time()
+
+    tmp_path = f"{PROGRESS_PATH}.tmp"
+
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+
+    os.replace(tmp_path, PROGRESS_PATH)
+
+
+def _alive(pid) -> bool:
+
+    # an exited child of this process stays a zombie until reaped, and
+    # os.kill(pid, 0) succeeds on a zombie
+    try:
+        reaped, _ = os.waitpid(pid, os.WNOHANG)
+        return reaped == 0
+
+    except ChildProcessError:
+        pass   # not our child, e.g. launched before a dashboard restart
+
+    except (OSError, TypeError):
+        return False
+
+    try:
+        os.kill(pid, 0)
+    except (OSError, TypeError):
+        return False
+
+    return True
+
+
+def is_running() -> bool:
+
+    if _process is not None and _process.poll() is None:
+        return True
+
+    progress = read_progress()
+
+    return (
+        progress is not None
+        and progress.get("status") == "running"
+        and _alive(progress.get("pid"))
+    )
+
+
+def start() -> bool:
+    """
+    Starts the bootstrap job unless one is already running. Returns True
+    when a new process was launched.
+    """
+
+    global _process
+
+    with _lock:
+
+        if is_running():
+            return False
+
+        # written before the launch, so it cannot overwrite the status of a
+        # child that fails straight away; the child records its own pid
+        _write_progress(
+            pid=None, status="running", stage="starting",
+            step=0, total=None, started_at=time.time(), error=None
+        )
+
+        with open(LOG_PATH, "ab") as log:
+            _process = subprocess.Popen(
+                [sys.executable, "-m", "pipelines.bootstrap"],
+                cwd=BASE_DIR,
+                stdin=subprocess.DEVNULL,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                start_new_session=True   # survives dashboard restarts
+            )
+
+        return True
+
+
+def run():
+
+    started_at = time.time()
+
+    _write_progress(
+        pid=os.getpid(), status="running", stage="starting",
+        step=0, total=None, started_at=started_at, error=None
+    )
+
+    def progress(stage, step, total):
+        print(f"[bootstrap] {step + 1}/{total} {stage}", flush=True)
+        _write_progress(
+            pid=os.getpid(), status="running", stage=stage,
+            step=step, total=total, started_at=started_at, error=None
+        )
+
+    try:
+        # heavy pipeline imports only happen inside the background process
+        from main import daily_run
+
+        daily_run(progress=progress)
+
+    except Exception as e:
+        traceback.print_exc()
+        _write_progress(
+            pid=os.getpid(), status="failed", stage=None,
+            step=None, total=None, started_at=started_at,
+            error=f"{type(e).__name__}: {e}"
+        )
+        raise
+
+    _write_progress(
+        pid=os.getpid(), status="done", stage=None,
+        step=None, total=None, started_at=started_at, error=None
+    )
+
+
+if __name__ == "__main__":
+    run()
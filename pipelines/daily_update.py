@@ -1,23 +1,22 @@
-import yfinance as yf
 import pandas as pd
-from datetime import datetime, timedelta, UTC
+from datetime import timedelta
 from utils.universe_loader import load_universe
 from database.db_connection import engine
-import pandas_market_calendars as mcal
+from database.writer import upsert
+from database import columnar_store
+from providers import get_provider
 
 
-def update_prices():
+def update_prices(tickers=None, provider=None):
 
     print("Updating prices incrementally...")
 
-    tickers = load_universe()
+    provider = provider or get_provider()
 
-    today = datetime.now(UTC).date()
+    if tickers is None:
+        tickers = load_universe()
 
-    nyse = mcal.get_calendar("NYSE")
-    schedule = nyse.schedule(start_date=today - timedelta(days=10), end_date=today)
-
-    end_date = schedule.index[-1].date()
+    today = provider.today()
 
     # ---------- detect last stored date ----------
     try:
@@ -29,79 +28,32 @@ def update_prices():
 
     except Exception:
         # first run
-        start_date = end_date - timedelta(days=3 * 365)
+        start_date = today - timedelta(days=3 * 365)
+
+    # completed sessions only: today's bar is still forming
+    sessions = [] if start_date >= today else \
+        provider.trading_days(start_date, today - timedelta(days=1))
 
-    if start_date >= end_date:
+    if len(sessions) == 0:
         print("Database already up to date")
         return
 
-    print(f"Downloading missing data from {start_date} to {end_date}")
-
-    data = yf.download(
-        tickers,
-        start=start_date,
-        end=end_date,
-        group_by="ticker",
-        auto_adjust=False,
-        progress=True
-    )
-
-    all_frames = []
-
-    for ticker in tickers:
-        try:
-            if ticker not in data.columns.get_level_values(0):
-                print(f"{ticker} download failed - retrying single download")
-                retry = yf.download(
-                    ticker,
-                    start=start_date,
-                    end=end_date,
-                    auto_adjust=False,
-                    progress=False
-                )
-
-                if retry is None or retry.empty:
-                    print(f"{ticker} retry failed - skipping")
-                    continue
-                df = retry.copy()
-            else:
-                df = data[ticker].copy()
-
-            if df is None or df.empty:
-                print(f"{ticker} returned empty data - skipping")
-                continue
-
-            df.reset_index(inplace=True)
-            df["ticker"] = ticker
-
-            df.rename(columns={
-                "Date": "date",
-                "Open": "open",
-                "High": "high",
-                "Low": "low",
-                "Close": "close",
-                "Volume": "volume"
-            }, inplace=True)
-
-            # remove today's incomplete bar
-            today = pd.Timestamp(datetime.now(UTC).date())
-            df = df[df["date"] < today]
-
-            all_frames.append(df)
-
-        except Exception as e:
-            print(f"{ticker} failed: {e}")
-            continue
-
-    if len(all_frames) == 0:
+    print(f"Downloading missing data from {start_date} to {sessions[-1].date()} ({provider.name})")
+
+    final_df = provider.bars(tickers, start_date, today)
+
+    # remove today's incomplete bar
+    final_df = final_df[pd.to_datetime(final_df["date"]) < pd.Timestamp(today)]
+
+    if final_df.empty:
         print("No new data downloaded")
         return
 
-    final_df = pd.concat(all_frames)
-
-    final_df.drop_duplicates(subset=["date", "ticker"], inplace=True)
+    final_df = final_df.drop_duplicates(subset=["date", "ticker"])
 
-    # append instead of replace
-    final_df.to_sql("daily_prices", engine, if_exists="append", index=False)
+    # upsert so a re-run after a partial failure cannot duplicate bars
+    result = upsert(final_df, "daily_prices")
+    columnar_store.mirror("daily_prices", final_df)
 
-    print("Prices incrementally updated successfully")
+    print(f"Prices incrementally updated successfully "
+          f"({result['inserted']:,} inserted, {result['updated']:,} updated)")
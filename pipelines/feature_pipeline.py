@@ -1,46 +1,71 @@
-from sqlalchemy import text, inspect
+import argparse
+from sqlalchemy import inspect
 import pandas as pd
-from database.db_connection import engine
-from features.technical_indicators import add_indicators
+from database.db_connection import config, engine
+from database.writer import upsert, replace_rows
+from database import columnar_store
+from features.technical_indicators import add_indicators, WARMUP_BARS
+from features.panel_indicators import add_indicators_panel
+from utils.incremental import load_with_lookback
 
 
-def run_feature_pipeline():
+# "panel" computes every ticker at once; "ta" is the per-ticker ta loop
+INDICATOR_ENGINE = config.get("features", {}).get("indicator_engine", "panel")
+
+
+def run_feature_pipeline(full=False):
 
     print("Running feature pipeline...")
 
-    prices = pd.read_sql("SELECT * FROM daily_prices", engine)
+    inspector = inspect(engine)
+    table_exists = "features" in inspector.get_table_names()
+
+    # ---------- load prices (only new bars + warm-up unless full) ----------
+    if full or not table_exists:
+        prices = pd.read_sql("SELECT * FROM daily_prices", engine)
+        prices["is_new"] = True
+    else:
+        prices = load_with_lookback("daily_prices", "features", WARMUP_BARS)
+
+    if prices.empty:
+        print("Features already up to date")
+        return
 
-    frames = []
+    if INDICATOR_ENGINE == "panel":
+        final = add_indicators_panel(prices)
 
-    for ticker, df in prices.groupby("ticker"):
-        df = df.sort_values("date")
-        df = add_indicators(df)
-        frames.append(df)
+    else:
+        frames = []
 
-    final = pd.concat(frames)
+        for ticker, df in prices.groupby("ticker"):
+            df = df.sort_values("date")
+            df = add_indicators(df)
+            frames.append(df)
+
+        final = pd.concat(frames)
+
+    # ---------- keep only rows that are not stored yet ----------
+    final = final[final["is_new"]].drop(columns=["is_new"])
 
     # ensure uniqueness before writing
     final.drop_duplicates(subset=["ticker", "date"], inplace=True)
 
-    # detect whether features table already exists
-    inspector = inspect(engine)
-    table_exists = "features" in inspector.get_table_names()
+    # full rebuild replaces every row, incremental runs upsert the new ones
+    if full:
+        result = replace_rows(final, "features")
+    else:
+        result = upsert(final, "features")
+
+    columnar_store.mirror("features", final, replace=full)
 
-    # delete existing rows for overlapping dates only if table exists
-    if table_exists:
-        min_date = final["date"].min()
-        max_date = final["date"].max()
+    print(f"Features generated successfully "
+          f"({result['inserted']:,} inserted, {result['updated']:,} updated)")
 
-        with engine.begin() as conn:
-            conn.execute(
-                text("""
-                    DELETE FROM features
-                    WHERE date BETWEEN :min_date AND :max_date
-                """),
-                {"min_date": min_date, "max_date": max_date}
-            )
 
-    # append refreshed rows (creates table automatically on first run)
-    final.to_sql("features", engine, if_exists="append", index=False)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build technical features")
+    parser.add_argument("--full", action="store_true",
+                        help="rebuild every ticker's full history")
+    args = parser.parse_args()
 
-    print("Features generated successfully")
+    run_feature_pipeline(full=args.full)
@@ -0,0 +1,266 @@
+import argparse
+import resource
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, UTC
+import pandas as pd
+from sqlalchemy import event
+from database.db_connection import config, engine
+
+
+metrics_config = config.get("metrics", {})
+
+ENABLED = metrics_config.get("enabled", True)
+REGRESSION_RATIO = metrics_config.get("regression_ratio", 1.5)
+REGRESSION_MIN_SECONDS = metrics_config.get("regression_min_seconds", 1.0)
+
+# ru_maxrss is in bytes on macOS and kilobytes elsewhere
+RSS_TO_MB = 1 / 1024 ** 2 if sys.platform == "darwin" else 1 / 1024
+
+_local = threading.local()
+_install_lock = threading.Lock()
+_installed = False
+
+
+class StageMetrics:
+    """
+    Counters for one stage run. SQL time and row counts are attributed to
+    the thread the stage runs on. peak_rss_mb is the process's high-water
+    mark when the stage ends (ru_maxrss), not the stage's own peak: it only
+    grows over a run, so the first stage that reaches it is the one to
+    look at.
+    """
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.status = "running"
+        self.started_at = datetime.now(UTC).isoformat()
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.peak_rss_mb = 0.0
+        self.rows_read = 0
+        self.rows_written = 0
+        self.sql_seconds = 0.0
+        self.sql_statements = 0
+
+    def as_row(self) -> dict:
+        return dict(vars(self))
+
+
+# ---------- SQL hooks (installed only when metrics are enabled) ----------
+class _CountingCursor(sqlite3.Cursor):
+    """
+    Counts fetched rows per fetch call rather than per row; pandas and
+    SQLAlchemy read result sets with a single fetchall / fetchmany.
+    """
+
+    def _count(self, rows):
+
+        metrics = getattr(_local, "metrics", None)
+
+        if metrics is not None:
+            metrics.rows_read += len(rows)
+
+        return rows
+
+    def fetchall(self):
+        return self._count(super().fetchall())
+
+    def fetchmany(self, *args, **kwargs):
+        return self._count(super().fetchmany(*args, **kwargs))
+
+    def fetchone(self):
+        row = super().fetchone()
+        return row if row is None else self._count([row])[0]
+
+
+class _CountingConnection(sqlite3.Connection):
+
+    def cursor(self, factory=_CountingCursor):
+        return super().cursor(factory)
+
+
+def _on_connect(dialect, connection_record, cargs, cparams):
+    cparams["factory"] = _CountingConnection
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    _local.sql_started = time.perf_counter()
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+
+    metrics = getattr(_local, "metrics", None)
+
+    if metrics is None:
+        return
+
+    metrics.sql_seconds += time.perf_counter() - _local.sql_started
+    metrics.sql_statements += 1
+
+    # rows staged in the upsert writer's temp table are counted once,
+    # when they land in the target table
+    head = statement.lstrip()[:40].upper()
+
+    if head.startswith(("INSERT", "UPDATE", "REPLACE")) and "_UPSERT_STAGE (" not in head:
+        metrics.rows_written += max(cursor.rowcount, 0)
+
+
+def install(target=engine):
+
+    global _installed
+
+    with _install_lock:
+        if _installed:
+            return
+
+        event.listen(target, "do_connect", _on_connect)
+        event.listen(target, "before_cursor_execute", _before_execute)
+        event.listen(target, "after_cursor_execute", _after_execute)
+
+        # pooled connections opened before the hook are replaced as they
+        # are returned
+        target.dispose()
+
+        _installed = True
+
+
+@contextmanager
+def measure(stage):
+    """
+    Times the wrapped block. Wall time, thread CPU time and peak RSS are
+    always taken; SQL time and row counts only when metrics are enabled.
+    """
+
+    if ENABLED:
+        install()
+
+    metrics = StageMetrics(stage)
+
+    _local.metrics = metrics
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+
+    try:
+        yield metrics
+        metrics.status = "ok"
+
+    except BaseException:
+        metrics.status = "failed"
+        raise
+
+    finally:
+        _local.metrics = None
+        metrics.wall_seconds = time.perf_counter() - wall_start
+        metrics.cpu_seconds = time.thread_time() - cpu_start
+        metrics.peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * RSS_TO_MB
+
+
+def new_run_id() -> str:
+    return datetime.now(UTC).strftime("%Y%m%dT%H%M%S%f")
+
+
+def save(run_id, pipeline, stage_metrics):
+
+    if not ENABLED or not stage_metrics:
+        return
+
+    from database.writer import upsert
+
+    rows = pd.DataFrame([m.as_row() for m in stage_metrics])
+    rows.insert(0, "pipeline", pipeline)
+    rows.insert(0, "run_id", run_id)
+
+    upsert(rows, "pipeline_runs")
+
+
+# ---------- Report ----------
+def load_runs(last=10, pipeline=None) -> pd.DataFrame:
+
+    runs = pd.read_sql(
+        "SELECT * FROM pipeline_runs ORDER BY run_id",
+        engine
+    )
+
+    if pipeline is not None:
+        runs = runs[runs["pipeline"] == pipeline]
+
+    # last N runs of each pipeline
+    recent = (
+        runs[["pipeline", "run_id"]].drop_duplicates()
+        .groupby("pipeline").tail(last)
+    )
+
+    return runs.merge(recent, on=["pipeline", "run_id"])
+
+
+def stage_trends(runs, ratio=REGRESSION_RATIO, min_seconds=REGRESSION_MIN_SECONDS) -> pd.DataFrame:
+    """
+    Latest wall time per stage against the median of its earlier runs in
+    `runs`. A stage regressed when it is `ratio` times slower and at least
+    `min_seconds` slower than that median.
+    """
+
+    rows = []
+
+    for (pipeline, stage), df in runs.groupby(["pipeline", "stage"], sort=False):
+
+        df = df.sort_values("run_id")
+        latest = df.iloc[-1]
+        baseline = df["wall_seconds"].iloc[:-1].median()
+
+        slowdown = latest["wall_seconds"] / baseline if baseline > 0 else float("nan")
+
+        rows.append({
+            "pipeline": pipeline,
+            "stage": stage,
+            "runs": len(df),
+            "wall_s": latest["wall_seconds"],
+            "median_s": baseline,
+            "ratio": slowdown,
+            "cpu_s": latest["cpu_seconds"],
+            "sql_s": latest["sql_seconds"],
+            "rows_read": latest["rows_read"],
+            "rows_written": latest["rows_written"],
+            "peak_rss_mb": latest["peak_rss_mb"],
+            "status": latest["status"],
+            "trend": " ".join(f"{v:.1f}" for v in df["wall_seconds"]),
+            "regression": bool(
+                slowdown > ratio
+                and latest["wall_seconds"] - baseline >= min_seconds
+            ),
+        })
+
+    return pd.DataFrame(rows).sort_values("pipeline", kind="stable")
+
+
+def report(last=10, pipeline=None):
+
+    runs = load_runs(last, pipeline)
+
+    if runs.empty:
+        print("No pipeline runs recorded")
+        return
+
+    trends = stage_trends(runs)
+
+    with pd.option_context("display.width", 200, "display.max_columns", None,
+                           "display.float_format", "{:.2f}".format):
+        print(trends.drop(columns=["trend"]).to_string(index=False))
+
+    print("\nWall time per stage, oldest to newest:")
+    for _, row in trends.iterrows():
+        flag = "  <-- REGRESSION" if row["regression"] else ""
+        print(f"  {row['pipeline']}/{row['stage']}: {row['trend']}{flag}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-stage pipeline timing report")
+    parser.add_argument("--last", type=int, default=10, help="runs per pipeline to include")
+    parser.add_argument("--pipeline", choices=["daily", "training"])
+    args = parser.parse_args()
+
+    report(last=args.last, pipeline=args.pipeline)
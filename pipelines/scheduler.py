@@ -0,0 +1,182 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from database.db_connection import config
+from pipelines import run_metrics
+
+
+MAX_WORKERS = config.get("scheduler", {}).get("max_workers", 4)
+
+
+class Stage:
+    """
+    A pipeline step and the tables it reads and writes. A stage depends on
+    every other stage that writes one of its inputs.
+    """
+
+    def __init__(self, name, fn, inputs=(), outputs=()):
+        self.name = name
+        self.fn = fn
+        self.inputs = set(inputs)
+        self.outputs = set(outputs)
+
+    def __repr__(self):
+        return f"Stage({self.name!r})"
+
+
+def dependencies(stages) -> dict:
+
+    names = [s.name for s in stages]
+
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate stage names in {names}")
+
+    deps = {
+        stage.name: {
+            other.name for other in stages
+            if other is not stage and other.outputs & stage.inputs
+        }
+        for stage in stages
+    }
+
+    _check_acyclic(deps)
+
+    return deps
+
+
+def _check_acyclic(deps):
+
+    remaining = {name: set(upstream) for name, upstream in deps.items()}
+
+    while remaining:
+        ready = [name for name, upstream in remaining.items() if not upstream]
+
+        if not ready:
+            raise ValueError(f"Stage graph has a cycle among {sorted(remaining)}")
+
+        for name in ready:
+            del remaining[name]
+
+        for upstream in remaining.values():
+            upstream.difference_update(ready)
+
+
+def upstream_closure(deps, targets) -> set:
+
+    unknown = set(targets) - set(deps)
+    if unknown:
+        raise ValueError(f"Unknown stages {sorted(unknown)}; known: {sorted(deps)}")
+
+    selected = set()
+    pending = list(targets)
+
+    while pending:
+        name = pending.pop()
+        if name not in selected:
+            selected.add(name)
+            pending.extend(deps[name])
+
+    return selected
+
+
+def critical_path(deps, durations) -> list:
+    """
+    Longest chain of dependent stages by wall time: the lower bound on the
+    run time however many workers are available.
+    """
+
+    finish = {}
+    previous = {}
+
+    def finish_time(name):
+        if name not in finish:
+            upstream = [d for d in deps[name] if d in durations]
+            before = max(upstream, key=finish_time, default=None)
+            previous[name] = before
+            finish[name] = durations[name] + (finish_time(before) if before else 0)
+        return finish[name]
+
+    end = max(durations, key=finish_time, default=None)
+
+    path = []
+    while end is not None:
+        path.append(end)
+        end = previous[end]
+
+    return path[::-1]
+
+
+def run(stages, targets=None, max_workers=MAX_WORKERS, progress=None,
+        pipeline="pipeline") -> dict:
+    """
+    Runs `stages` (or only `targets` and their upstream stages) on a thread
+    pool, starting each stage as soon as its dependencies finish. Returns
+    the wall time per stage; per-stage metrics go to pipeline_runs. After
+    a failure no further stages start; the error is re-raised once the
+    stages already running have finished.
+    """
+
+    deps = dependencies(stages)
+    by_name = {s.name: s for s in stages}
+
+    selected = set(deps) if targets is None else upstream_closure(deps, targets)
+
+    # declaration order breaks ties so the run is deterministic
+    waiting = [s.name for s in stages if s.name in selected]
+    pending = {name: deps[name] & selected for name in waiting}
+
+    done = set()
+    durations = {}
+    running = {}
+    measured = []
+    error = None
+    started = time.perf_counter()
+    run_id = run_metrics.new_run_id()
+
+    def timed(stage):
+        with run_metrics.measure(stage.name) as metrics:
+            measured.append(metrics)
+            stage.fn()
+        return metrics.wall_seconds
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+
+        while waiting or running:
+
+            if error is None:
+                for name in [n for n in waiting if pending[n] <= done]:
+                    waiting.remove(name)
+
+                    if progress is not None:
+                        progress(name, len(done) + len(running), len(selected))
+
+                    running[pool.submit(timed, by_name[name])] = name
+
+            if not running:
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in finished:
+                name = running.pop(future)
+
+                try:
+                    durations[name] = future.result()
+                    done.add(name)
+                except Exception as e:
+                    print(f"Stage {name} failed: {e}")
+                    error = error or e
+
+    run_metrics.save(run_id, pipeline, measured)
+
+    if error is not None:
+        raise error
+
+    total = time.perf_counter() - started
+    path = critical_path(deps, durations)
+
+    print(
+        f"Critical path ({sum(durations[n] for n in path):.1f}s of {total:.1f}s wall): "
+        + " -> ".join(f"{n} ({durations[n]:.1f}s)" for n in path)
+    )
+
+    return durations
@@ -0,0 +1,103 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, UTC
+import pandas as pd
+from tenacity import Retrying, retry_if_not_exception_type, stop_after_attempt, wait_exponential
+from database.db_connection import engine
+from database.writer import replace_rows
+from providers import get_provider
+from utils import http_cache
+from utils.update_guard import should_run, mark_run
+
+
+MAX_WORKERS = 8
+MAX_ATTEMPTS = 3
+
+
+def fetch_ticker_info(tickers, fetch=None, max_workers=MAX_WORKERS,
+                      attempts=MAX_ATTEMPTS) -> dict:
+    """
+    Fetches `fetch(ticker)` (default: the market data provider's `info`)
+    for every ticker on a bounded thread pool, retried with exponential
+    backoff. An offline cache miss is not retried. Tickers that still fail
+    are left out of the returned {ticker: info} mapping.
+    """
+
+    fetch = fetch or get_provider().info
+
+    def fetch_one(ticker):
+
+        retrying = Retrying(
+            stop=stop_after_attempt(attempts),
+            wait=wait_exponential(multiplier=0.5, max=8),
+            # offline, a cache miss cannot succeed on a retry
+            retry=retry_if_not_exception_type(http_cache.CacheMiss),
+            reraise=True
+        )
+
+        try:
+            for attempt in retrying:
+                with attempt:
+                    return ticker, fetch(ticker)
+
+        except Exception as e:
+            print(f"{ticker} info failed: {e}")
+            return ticker, None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = pool.map(fetch_one, tickers)
+
+        return {t: info for t, info in results if info}
+
+
+def update_ticker_info(fetch=None):
+
+    # ---------- run only if either consumer needs a refresh ----------
+    fundamentals_due = should_run("fundamentals_update", 24)
+    analyst_due = should_run("analyst_update", 24)
+
+    if not (fundamentals_due or analyst_due):
+        return
+
+    print("Downloading ticker info (fundamentals + analyst expectations)...")
+
+    tickers = pd.read_sql(
+        "SELECT ticker FROM companies",
+        engine
+    )["ticker"].tolist()
+
+    infos = fetch_ticker_info(tickers, fetch=fetch)
+
+    if len(infos) == 0:
+        print("No ticker info downloaded")
+        return
+
+    now = datetime.now(UTC)
+
+    fundamentals = pd.DataFrame([
+        {
+            "ticker": t,
+            "market_cap": info.get("marketCap")
+        }
+        for t, info in infos.items()
+    ])
+
+    analyst = pd.DataFrame([
+        {
+            "ticker": t,
+            "target_mean_price": info.get("targetMeanPrice"),
+            "target_high_price": info.get("targetHighPrice"),
+            "target_low_price": info.get("targetLowPrice"),
+            "number_of_analysts": info.get("numberOfAnalystOpinions"),
+            "last_update": now
+        }
+        for t, info in infos.items()
+    ])
+
+    replace_rows(fundamentals, "fundamentals")
+    replace_rows(analyst, "analyst_expectations")
+
+    # ---------- mark both jobs complete ----------
+    mark_run("fundamentals_update")
+    mark_run("analyst_update")
+
+    print(f"Ticker info updated for {len(infos)} of {len(tickers)} tickers")
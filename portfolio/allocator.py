@@ -1,12 +1,22 @@
+import argparse
 import pandas as pd
+from sqlalchemy import text
 from database.db_connection import engine
+from risk.ranking_engine import stored_version, first_open_date, replace_dates
 
 
-def run_allocator():
+def run_allocator(full=False):
 
     print("Running portfolio allocator...")
 
-    ranked = pd.read_sql("SELECT * FROM daily_ranked", engine)
+    # re-ranked history after a retrain is reallocated too
+    since = first_open_date("daily_portfolio", full, stored_version("daily_ranked"))
+
+    ranked = pd.read_sql(
+        text("SELECT * FROM daily_ranked WHERE date >= :since"),
+        engine,
+        params={"since": since}
+    )
     companies = pd.read_sql("SELECT ticker, sector FROM companies", engine)
 
     buys = ranked[ranked["signal"] == "BUY"].merge(companies, on="ticker")
@@ -15,25 +25,23 @@ def run_allocator():
         print("No BUY signals today")
         return
 
-    # Equal capital per sector
-    sectors = buys["sector"].unique()
-    sector_weight = 1 / len(sectors)
-
-    allocations = []
-
-    for sector in sectors:
-        sector_df = buys[buys["sector"] == sector].copy()
+    # Equal capital per sector within each date, split by score inside it
+    by_date = buys.groupby("date")
+    sector_score = buys.groupby(["date", "sector"])["score"].transform("sum")
+    sectors = by_date["sector"].transform("nunique")
 
-        total_score = sector_df["score"].sum()
+    buys["allocation_pct"] = buys["score"] / sector_score / sectors
 
-        sector_df["allocation_pct"] = (
-            (sector_df["score"] / total_score) * sector_weight
-        )
+    replace_dates(buys, "daily_portfolio", since)
 
-        allocations.append(sector_df)
+    print(f"Sector-balanced allocation completed from {buys['date'].min()} "
+          f"({by_date.ngroups:,} dates)")
 
-    portfolio = pd.concat(allocations)
 
-    portfolio.to_sql("daily_portfolio", engine, if_exists="replace", index=False)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Allocate capital across ranked BUY candidates")
+    parser.add_argument("--full", action="store_true",
+                        help="reallocate every date")
+    args = parser.parse_args()
 
-    print("Sector-balanced allocation completed")
+    run_allocator(full=args.full)
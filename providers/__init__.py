@@ -0,0 +1,45 @@
+import os
+import threading
+from database.db_connection import BASE_DIR, config
+
+
+provider_config = config.get("market_data", {})
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def make_provider(name):
+
+    if name == "yfinance":
+        from providers.yfinance_provider import YFinanceProvider
+        return YFinanceProvider()
+
+    if name == "replay":
+        from providers.replay_provider import ReplayProvider
+
+        replay = provider_config.get("replay", {})
+
+        return ReplayProvider(
+            os.path.join(BASE_DIR, replay.get("path", "data/replay")),
+            seconds_per_day=replay.get("seconds_per_day", 0),
+            start=replay.get("start")
+        )
+
+    raise ValueError(f"Unknown market data provider {name!r}")
+
+
+def get_provider():
+    """
+    Returns the process-wide provider named by VESIGN_PROVIDER or
+    market_data.provider (default: yfinance).
+    """
+
+    global _provider
+
+    with _provider_lock:
+        if _provider is None:
+            name = os.environ.get("VESIGN_PROVIDER") or provider_config.get("provider", "yfinance")
+            _provider = make_provider(name)
+
+    return _provider
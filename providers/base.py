@@ -0,0 +1,49 @@
+from datetime import datetime, UTC
+import pandas as pd
+
+
+# long format returned by every provider's `bars`
+BAR_COLUMNS = ["date", "ticker", "open", "high", "low", "close", "Adj Close", "volume"]
+
+
+class MarketDataProvider:
+    """
+    Source of daily bars, per-ticker reference info and the trading
+    calendar for the ingestion pipelines.
+    """
+
+    name = "base"
+
+    def today(self):
+        """
+        The provider's current date. Replays move this with their clock.
+        """
+        return datetime.now(UTC).date()
+
+    def trading_days(self, start, end) -> pd.DatetimeIndex:
+        raise NotImplementedError
+
+    def bars(self, tickers, start, end) -> pd.DataFrame:
+        """
+        Daily bars for `tickers` with start <= date < end, in BAR_COLUMNS
+        order. Tickers without data are left out.
+        """
+        raise NotImplementedError
+
+    def info(self, ticker) -> dict:
+        """
+        Reference data in yfinance `.info` keys (marketCap,
+        targetMeanPrice, ...). Unknown tickers return an empty dict.
+        """
+        raise NotImplementedError
+
+    def tickers(self) -> list:
+        """
+        Tickers the provider holds data for, for providers with a fixed
+        set (replays). Empty when any ticker can be asked for.
+        """
+        return []
+
+
+def empty_bars() -> pd.DataFrame:
+    return pd.DataFrame(columns=BAR_COLUMNS)
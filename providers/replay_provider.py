@@ -0,0 +1,206 @@
+import argparse
+import glob
+import os
+import time
+import pandas as pd
+from providers.base import MarketDataProvider, BAR_COLUMNS, empty_bars
+
+
+INFO_FILE = "info.csv"
+
+COLUMN_NAMES = {
+    "Date": "date",
+    "Ticker": "ticker",
+    "Open": "open",
+    "High": "high",
+    "Low": "low",
+    "Close": "close",
+    "Adj_Close": "Adj Close",
+    "adj_close": "Adj Close",
+    "Volume": "volume",
+}
+
+
+def _read_bars(path) -> pd.DataFrame:
+
+    if path.endswith(".parquet"):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path)
+
+    df = df.rename(columns=COLUMN_NAMES)
+
+    # one-ticker files may leave the ticker to the file name (AAPL.csv)
+    if "ticker" not in df.columns:
+        df["ticker"] = os.path.splitext(os.path.basename(path))[0]
+
+    if "Adj Close" not in df.columns:
+        df["Adj Close"] = df["close"]
+
+    df["date"] = pd.to_datetime(df["date"]).dt.tz_localize(None).dt.normalize()
+
+    return df[BAR_COLUMNS]
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Serves bars from a local directory of Parquet / CSV files and
+    reference data from its info.csv. The trading calendar is the set of
+    dates present in the files.
+
+    With seconds_per_day = 0 every bar is available at once. Otherwise a
+    replay clock starts at `start` (default: the earliest date) and
+    releases one more trading day every `seconds_per_day` seconds, so
+    repeated ingestion runs see a market that moves forward like a live
+    one.
+    """
+
+    name = "replay"
+
+    def __init__(self, path, seconds_per_day=0, start=None):
+
+        self.path = path
+        self.seconds_per_day = seconds_per_day
+        self.start = None if start is None else pd.Timestamp(start)
+
+        self._bars = None
+        self._info = None
+        self._clock_started = None
+
+    # ---------- data ----------
+    def _load(self) -> pd.DataFrame:
+
+        if self._bars is None:
+
+            files = sorted(
+                f for pattern in ("*.parquet", "*.csv")
+                for f in glob.glob(os.path.join(self.path, "**", pattern), recursive=True)
+                if os.path.basename(f) != INFO_FILE
+            )
+
+            if not files:
+                raise FileNotFoundError(f"No Parquet or CSV bars under {self.path}")
+
+            self._bars = (
+                pd.concat([_read_bars(f) for f in files], ignore_index=True)
+                .drop_duplicates(subset=["ticker", "date"], keep="last")
+                .sort_values(["date", "ticker"], ignore_index=True)
+            )
+
+            self._calendar = pd.DatetimeIndex(self._bars["date"].unique())
+
+        return self._bars
+
+    def calendar(self) -> pd.DatetimeIndex:
+        self._load()
+        return self._calendar
+
+    # ---------- clock ----------
+    def today(self):
+
+        calendar = self.calendar()
+
+        if not self.seconds_per_day:
+            # past the last bar, so everything counts as a completed day
+            return (calendar[-1] + pd.Timedelta(days=1)).date()
+
+        if self._clock_started is None:
+            self._clock_started = time.monotonic()
+
+        first = 0 if self.start is None else calendar.searchsorted(self.start)
+        elapsed_days = int((time.monotonic() - self._clock_started) / self.seconds_per_day)
+
+        position = min(first + elapsed_days, len(calendar))
+
+        if position == len(calendar):
+            return (calendar[-1] + pd.Timedelta(days=1)).date()
+
+        return calendar[position].date()
+
+    def trading_days(self, start, end) -> pd.DatetimeIndex:
+
+        calendar = self.calendar()
+
+        return calendar[(calendar >= pd.Timestamp(start)) & (calendar <= pd.Timestamp(end))]
+
+    def bars(self, tickers, start, end) -> pd.DataFrame:
+
+        bars = self._load()
+
+        # never serve bars the replay clock has not reached yet
+        end = min(pd.Timestamp(end), pd.Timestamp(self.today()))
+
+        mask = (
+            (bars["date"] >= pd.Timestamp(start))
+            & (bars["date"] < end)
+            & bars["ticker"].isin(tickers)
+        )
+
+        if not mask.any():
+            return empty_bars()
+
+        return bars[mask].reset_index(drop=True)
+
+    def tickers(self) -> list:
+        return sorted(self._load()["ticker"].unique())
+
+    def info(self, ticker) -> dict:
+
+        if self._info is None:
+            path = os.path.join(self.path, INFO_FILE)
+            self._info = (
+                pd.read_csv(path).set_index("ticker").to_dict("index")
+                if os.path.exists(path) else {}
+            )
+
+        return {
+            key: value for key, value in self._info.get(ticker, {}).items()
+            if pd.notna(value)
+        }
+
+
+def export(path, tickers=None):
+    """
+    Writes a replay directory from the current database: one Parquet file
+    of bars per year plus info.csv built from companies, fundamentals and
+    analyst expectations.
+    """
+
+    from database.db_connection import engine
+
+    os.makedirs(path, exist_ok=True)
+
+    prices = pd.read_sql("SELECT * FROM daily_prices", engine)
+
+    if tickers:
+        prices = prices[prices["ticker"].isin(tickers)]
+
+    for year, df in prices.groupby(prices["date"].str[:4]):
+        df.to_parquet(os.path.join(path, f"bars-{year}.parquet"), index=False)
+
+    info = pd.read_sql("""
+        SELECT c.ticker,
+               c.company AS longName,
+               c.sector,
+               f.market_cap AS marketCap,
+               a.target_mean_price AS targetMeanPrice,
+               a.target_high_price AS targetHighPrice,
+               a.target_low_price AS targetLowPrice,
+               a.number_of_analysts AS numberOfAnalystOpinions
+        FROM companies c
+        LEFT JOIN fundamentals f ON f.ticker = c.ticker
+        LEFT JOIN analyst_expectations a ON a.ticker = c.ticker
+    """, engine)
+
+    info.to_csv(os.path.join(path, INFO_FILE), index=False)
+
+    print(f"Exported {len(prices):,} bars for {prices['ticker'].nunique():,} tickers to {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the database as a replay directory")
+    parser.add_argument("path")
+    parser.add_argument("--ticker", action="append", dest="tickers")
+    args = parser.parse_args()
+
+    export(args.path, args.tickers)
@@ -0,0 +1,148 @@
+import threading
+import time
+import pandas as pd
+from providers.base import MarketDataProvider, BAR_COLUMNS, empty_bars
+from utils import http_cache
+
+
+REQUESTS_PER_SECOND = 5
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class RateLimiter:
+    """
+    Spaces calls at least 1 / rate seconds apart across all worker threads.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate else 0
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def get_session():
+    """
+    Returns the HTTP session shared by every yfinance call in this process.
+    """
+
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            from curl_cffi import requests as curl_requests
+            _session = curl_requests.Session(impersonate="chrome")
+
+    return _session
+
+
+limiter = RateLimiter(REQUESTS_PER_SECOND)
+
+
+def yfinance_fetch(ticker: str) -> dict:
+    import yfinance as yf
+
+    def download():
+        limiter.wait()
+        return yf.Ticker(ticker, session=get_session()).info
+
+    # cache hits skip both the network and the rate limiter
+    return http_cache.memoize("yfinance.info", ticker, download)
+
+
+def _long_bars(df, ticker) -> pd.DataFrame:
+
+    df = df.reset_index().rename(columns={
+        "Date": "date",
+        "Open": "open",
+        "High": "high",
+        "Low": "low",
+        "Close": "close",
+        "Volume": "volume"
+    })
+    df["ticker"] = ticker
+
+    return df[BAR_COLUMNS]
+
+
+class YFinanceProvider(MarketDataProvider):
+    """
+    Yahoo Finance bars and `.info`, with the NYSE calendar from
+    pandas_market_calendars. Responses go through the on-disk HTTP cache.
+    """
+
+    name = "yfinance"
+
+    def trading_days(self, start, end) -> pd.DatetimeIndex:
+        import pandas_market_calendars as mcal
+
+        schedule = mcal.get_calendar("NYSE").schedule(start_date=start, end_date=end)
+
+        return schedule.index
+
+    def bars(self, tickers, start, end) -> pd.DataFrame:
+        import yfinance as yf
+
+        data = http_cache.memoize(
+            "yfinance.download",
+            [tickers, start, end],
+            lambda: yf.download(
+                tickers,
+                start=start,
+                end=end,
+                group_by="ticker",
+                auto_adjust=False,
+                progress=True
+            )
+        )
+
+        frames = []
+
+        for ticker in tickers:
+            try:
+                if ticker not in data.columns.get_level_values(0):
+                    print(f"{ticker} download failed - retrying single download")
+                    retry = yf.download(
+                        ticker,
+                        start=start,
+                        end=end,
+                        auto_adjust=False,
+                        progress=False,
+                        multi_level_index=False
+                    )
+
+                    if retry is None or retry.empty:
+                        print(f"{ticker} retry failed - skipping")
+                        continue
+                    df = retry.copy()
+                else:
+                    df = data[ticker].copy()
+
+                if df is None or df.empty:
+                    print(f"{ticker} returned empty data - skipping")
+                    continue
+
+                frames.append(_long_bars(df, ticker))
+
+            except Exception as e:
+                print(f"{ticker} failed: {e}")
+                continue
+
+        if not frames:
+            return empty_bars()
+
+        return pd.concat(frames, ignore_index=True)
+
+    def info(self, ticker) -> dict:
+        return yfinance_fetch(ticker)
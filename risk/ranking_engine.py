@@ -1,35 +1,126 @@
+import argparse
 import pandas as pd
-from database.db_connection import engine
+from sqlalchemy import inspect, text
+from database.db_connection import config, engine
+from database.writer import upsert
 
 
-def run_ranking():
+ranking_config = config.get("ranking", {})
+
+TOP_K = ranking_config.get("top_k", 20)
+PREDICTION_WEIGHT = ranking_config.get("prediction_weight", 0.5)
+
+
+def stored_version(table: str):
+    """
+    weights_version of the latest rows of `table`, None if it has none.
+    """
+
+    if table not in inspect(engine).get_table_names():
+        return None
+
+    with engine.connect() as conn:
+        return conn.exec_driver_sql(
+            f"SELECT weights_version FROM {table} ORDER BY date DESC LIMIT 1"
+        ).scalar()
+
+
+def first_open_date(table: str, full=False, version=None) -> str:
+    """
+    Earliest date to (re)compute in `table`: its last stored date, which
+    may have been written before every ticker's signal for it arrived.
+    "" means everything, also when rows were computed under another
+    weights `version`, as after a retrain rescored all predictions.
+    """
+
+    if full or table not in inspect(engine).get_table_names():
+        return ""
+
+    with engine.connect() as conn:
+
+        stale = conn.execute(
+            text(f"SELECT 1 FROM {table} WHERE weights_version IS NOT :version LIMIT 1"),
+            {"version": version}
+        ).first()
+
+        if stale is not None:
+            return ""
+
+        return conn.exec_driver_sql(f"SELECT MAX(date) FROM {table}").scalar() or ""
+
+
+def replace_dates(df, table: str, since: str) -> dict:
+    """
+    Replaces the rows of `table` dated `since` or later with `df`, so
+    candidates that dropped out of a re-ranked day do not linger.
+    """
+
+    with engine.begin() as conn:
+
+        if table in inspect(conn).get_table_names():
+            conn.execute(text(f"DELETE FROM {table} WHERE date >= :since"), {"since": since})
+
+        return upsert(df, table, conn)
+
+
+def run_ranking(full=False, top_k=TOP_K, prediction_weight=PREDICTION_WEIGHT):
 
     print("Running ranking engine...")
 
-    signals = pd.read_sql("SELECT * FROM signals", engine)
+    version = stored_version("predictions")
+
+    since = first_open_date("daily_ranked", full, version)
+
+    # BUY rows come off the (date, signal, ticker) index; each date's
+    # candidates are ranked by a blend of cross-sectional percentiles and
+    # only the first top_k rows per date are kept
+    ranked = pd.read_sql(
+        text("""
+            WITH buys AS (
+                SELECT s.*,
+                       p.prediction_score,
+                       (1 - :weight) * PERCENT_RANK() OVER (
+                           PARTITION BY s.date ORDER BY s.score
+                       )
+                       + :weight * PERCENT_RANK() OVER (
+                           PARTITION BY s.date ORDER BY p.prediction_score
+                       ) AS rank_score
+                FROM signals s
+                LEFT JOIN predictions p
+                  ON p.ticker = s.ticker AND p.date = s.date
+                WHERE s.date >= :since AND s.signal = 'BUY'
+            ),
+            ranked AS (
+                SELECT buys.*,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY date
+                           ORDER BY rank_score DESC, score DESC, ticker
+                       ) AS rank
+                FROM buys
+            )
+            SELECT ranked.*, :version AS weights_version FROM ranked
+            WHERE :top_k = 0 OR rank <= :top_k
+        """),
+        engine,
+        params={"since": since, "weight": prediction_weight, "top_k": top_k,
+                "version": version}
+    )
 
-    # ---------- keep only BUY candidates ----------
-    ranked = signals[signals["signal"] == "BUY"].copy()
+    result = replace_dates(ranked, "daily_ranked", since)
 
     if ranked.empty:
         print("No BUY signals to rank")
-        ranked.to_sql("daily_ranked", engine,
-                      if_exists="replace", index=False)
         return
 
-    # ---------- rank by prediction score ----------
-    ranked = ranked.sort_values(
-        ["date", "score"],
-        ascending=[True, False]
-    )
+    print(f"Ranking completed from {ranked['date'].min()} "
+          f"({result['inserted']:,} candidates, top {top_k or 'all'} per date)")
 
-    # ---------- create rank per day ----------
-    ranked["rank"] = (
-        ranked.groupby("date")["score"]
-        .rank(method="first", ascending=False)
-    )
 
-    ranked.to_sql("daily_ranked", engine,
-                  if_exists="replace", index=False)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank BUY candidates per date")
+    parser.add_argument("--full", action="store_true",
+                        help="re-rank every date, e.g. after changing the ranking config "
+                             "(a new weights version re-ranks every date by itself)")
+    args = parser.parse_args()
 
-    print("Ranking completed")
+    run_ranking(full=args.full)
@@ -0,0 +1,241 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from threadpoolctl import threadpool_limits
+from sqlalchemy import text
+from database.db_connection import config, engine
+from database.schema import MODEL_FACTORS
+from database.writer import upsert
+from database.columnar_store import read_table
+from scoring.weight_training import HORIZONS, WINDOW_DAYS
+
+
+cv_config = config.get("model", {}).get("cross_validation", {})
+
+FOLDS = cv_config.get("folds", 5)
+EMBARGO_DAYS = cv_config.get("embargo_days", 5)
+WORKERS = cv_config.get("workers", 0) or os.cpu_count()
+
+
+# ---------- Data ----------
+def load_samples(factors):
+    """
+    Factor matrix, label matrix (one column per horizon) and trading-day
+    index of every features row, sorted by date so that any range of dates
+    is a contiguous slice.
+    """
+
+    features = read_table("features", columns=["date", "ticker", *factors])
+
+    fwd = pd.read_sql(
+        text(f"SELECT date, ticker, {', '.join(f'fwd_{h}d' for h in HORIZONS)} "
+             f"FROM forward_returns"),
+        engine
+    )
+
+    df = features.merge(fwd, on=["date", "ticker"]).sort_values("date", kind="stable")
+
+    dates, day = np.unique(df["date"].to_numpy(dtype=str), return_inverse=True)
+
+    X = df[factors].to_numpy(dtype=float)
+    Y = df[[f"fwd_{h}d" for h in HORIZONS]].to_numpy(dtype=float)
+
+    return dates, day, X, Y
+
+
+def walk_forward_folds(n_dates, folds=FOLDS):
+    """
+    Splits the date axis into folds + 1 contiguous blocks; every block but
+    the first is a test block, trained on what precedes it.
+    """
+
+    blocks = np.array_split(np.arange(n_dates), folds + 1)[1:]
+
+    return [(block[0], block[-1]) for block in blocks if len(block)]
+
+
+# ---------- Scores ----------
+def rank_ic(day, pred, y) -> float:
+    """
+    Mean over dates of the cross-sectional Spearman correlation between
+    predictions and realized returns.
+    """
+
+    ranks = pd.DataFrame({"pred": pred, "y": y}).groupby(day).rank()
+
+    _, group = np.unique(day, return_inverse=True)
+
+    centred = ranks - ranks.groupby(group).transform("mean")
+    p = centred["pred"].to_numpy()
+    r = centred["y"].to_numpy()
+
+    cov = np.bincount(group, weights=p * r)
+    var = np.bincount(group, weights=p * p) * np.bincount(group, weights=r * r)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ic = cov / np.sqrt(var)
+
+    ic = ic[var > 0]
+    return ic.mean() if len(ic) else np.nan
+
+
+def fit_fold(X, Y, day, columns, fold, test, dates, window_days, embargo_days, threads):
+    """
+    Fits every horizon on the purged, embargoed training window before one
+    test block and scores it out of sample. Runs inside a worker process;
+    X, Y and day arrive memory-mapped.
+    """
+
+    test_start, test_end = test
+    rows = []
+
+    # rows are date-sorted, so a date range is a slice
+    def rows_of(first_day, last_day):
+        return slice(np.searchsorted(day, first_day), np.searchsorted(day, last_day, side="right"))
+
+    with threadpool_limits(limits=threads, user_api="blas"):
+
+        for h_idx, h in enumerate(HORIZONS):
+
+            # purge: labels of the last h training days overlap the test
+            # block; embargo: a further gap against serial correlation
+            train_end = test_start - h - embargo_days - 1
+
+            if train_end < 0:
+                continue
+
+            train_start = 0
+            if window_days:
+                cutoff = np.datetime64(dates[train_end]) - np.timedelta64(window_days, "D")
+                train_start = int(np.searchsorted(dates.astype("datetime64[D]"), cutoff))
+
+            train = rows_of(train_start, train_end)
+            held_out = rows_of(test_start, test_end)
+
+            X_train, y_train = X[train][:, columns], Y[train, h_idx]
+            X_test, y_test = X[held_out][:, columns], Y[held_out, h_idx]
+
+            ok_train = np.isfinite(X_train).all(axis=1) & np.isfinite(y_train)
+            ok_test = np.isfinite(X_test).all(axis=1) & np.isfinite(y_test)
+
+            row = {
+                "fold": fold,
+                "horizon": h,
+                "train_start": dates[train_start],
+                "train_end": dates[train_end],
+                "test_start": dates[test_start],
+                "test_end": dates[test_end],
+                "train_samples": int(ok_train.sum()),
+                "test_samples": int(ok_test.sum()),
+                "r2": np.nan,
+                "ic": np.nan,
+                "hit_rate": np.nan,
+            }
+
+            if ok_train.sum() > len(columns) + 1 and ok_test.any():
+
+                A = np.column_stack([np.ones(ok_train.sum()), X_train[ok_train]])
+                beta, *_ = np.linalg.lstsq(A, y_train[ok_train], rcond=None)
+
+                y = y_test[ok_test]
+                pred = beta[0] + X_test[ok_test] @ beta[1:]
+
+                row["r2"] = 1 - ((y - pred) ** 2).sum() / ((y - y.mean()) ** 2).sum()
+                row["ic"] = rank_ic(day[held_out][ok_test], pred, y)
+
+                moved = y != 0
+                row["hit_rate"] = (np.sign(pred[moved]) == np.sign(y[moved])).mean()
+
+            rows.append(row)
+
+    return rows
+
+
+def run_cross_validation(factor_sets=None, folds=FOLDS, embargo_days=EMBARGO_DAYS,
+                         window_days=WINDOW_DAYS, workers=WORKERS):
+
+    print("Running walk-forward cross-validation...")
+
+    factor_sets = factor_sets or [MODEL_FACTORS]
+    factors = list(dict.fromkeys(f for factor_set in factor_sets for f in factor_set))
+
+    dates, day, X, Y = load_samples(factors)
+
+    if not len(dates):
+        print("No features with forward returns to validate on")
+        return
+
+    splits = walk_forward_folds(len(dates), folds)
+
+    jobs = [
+        (factor_set, fold, test)
+        for factor_set in factor_sets
+        for fold, test in enumerate(splits)
+    ]
+
+    workers = min(workers, len(jobs))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+
+    print(f"  {len(factor_sets)} factor set(s) x {len(splits)} folds, {len(X):,} rows, "
+          f"{workers} workers x {threads} BLAS thread(s)")
+
+    # loky memory-maps the large arrays into the workers instead of
+    # pickling a copy per job
+    results = Parallel(n_jobs=workers, backend="loky")(
+        delayed(fit_fold)(
+            X, Y, day, [factors.index(f) for f in factor_set], fold, test,
+            dates, window_days, embargo_days, threads
+        )
+        for factor_set, fold, test in jobs
+    )
+
+    frames = []
+
+    for (factor_set, _, _), rows in zip(jobs, results):
+        frame = pd.DataFrame(rows)
+        frame.insert(0, "factor_set", ",".join(factor_set))
+        frames.append(frame)
+
+    scores = pd.concat(frames, ignore_index=True)
+
+    if scores.empty:
+        print("Not enough history for a single purged fold")
+        return
+
+    scores.insert(0, "run_at", pd.Timestamp.now("UTC").isoformat())
+
+    upsert(scores, "cv_results")
+
+    print(scores[["factor_set", "fold", "horizon", "test_start", "test_end",
+                  "test_samples", "r2", "ic", "hit_rate"]]
+          .to_string(index=False, float_format=lambda x: f"{x:.4f}"))
+
+    summary = scores.groupby(["factor_set", "horizon"])[["r2", "ic", "hit_rate"]].mean()
+
+    print("\nMean over folds:")
+    print(summary.to_string(float_format=lambda x: f"{x:.4f}"))
+
+    print("Cross-validation completed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Purged walk-forward cross-validation of the factor model")
+    parser.add_argument("--factor-set", action="append", dest="factor_sets",
+                        help="comma-separated factor columns; repeat to compare sets "
+                             "(default: model.factors)")
+    parser.add_argument("--folds", type=int, default=FOLDS)
+    parser.add_argument("--embargo-days", type=int, default=EMBARGO_DAYS)
+    parser.add_argument("--window-days", type=int, default=WINDOW_DAYS,
+                        help="calendar days of training history per fold (0 = expanding)")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    args = parser.parse_args()
+
+    run_cross_validation(
+        factor_sets=[s.split(",") for s in args.factor_sets] if args.factor_sets else None,
+        folds=args.folds,
+        embargo_days=args.embargo_days,
+        window_days=args.window_days,
+        workers=args.workers,
+    )
@@ -1,49 +1,101 @@
+import argparse
+import numpy as np
 import pandas as pd
-from database.db_connection import engine
+from sqlalchemy import inspect
+from database.db_connection import config, engine
+from database.schema import MODEL_FACTORS, WEIGHT_HORIZONS
+from database.writer import upsert, replace_rows
+from database.columnar_store import read_table
+from scoring.weight_training import latest_version
+from utils.incremental import load_with_lookback
 
 
-def run_prediction_engine():
+# factor_weights prefix -> share of prediction_score
+SCORE_BLEND = config.get("model", {}).get("score_blend", {"short": 0.6, "med": 0.4})
+
+
+def predict(features, w) -> pd.DataFrame:
+    """
+    pred_{h}d for every weight horizon as one (rows x factors) @
+    (factors x horizons) product, blended into prediction_score.
+    """
+
+    prefixes = list(WEIGHT_HORIZONS)
+
+    W = np.array(
+        [[w[f"{prefix}_{factor}"] for prefix in prefixes] for factor in MODEL_FACTORS],
+        dtype=float
+    )
+    blend = np.array([SCORE_BLEND.get(prefix, 0.0) for prefix in prefixes])
+
+    preds = features[MODEL_FACTORS].to_numpy(dtype=float) @ W
+
+    out = features[["date", "ticker"]].reset_index(drop=True)
+
+    for i, prefix in enumerate(prefixes):
+        out[f"pred_{WEIGHT_HORIZONS[prefix]}d"] = preds[:, i]
+
+    out["prediction_score"] = preds @ blend
+    out["weights_version"] = w["trained_at"]
+
+    return out
+
+
+def needs_full_recompute(version) -> bool:
+
+    if "predictions" not in inspect(engine).get_table_names():
+        return True
+
+    # a full run rescores every row under one version, so the newest row
+    # (a seek on ix_predictions_date) tells whether factor_weights changed
+    with engine.connect() as conn:
+        stored = conn.exec_driver_sql(
+            "SELECT weights_version FROM predictions ORDER BY date DESC LIMIT 1"
+        ).scalar()
+
+    return stored != version
+
+
+def run_prediction_engine(full=False):
 
     print("Running prediction score engine...")
 
-    features = pd.read_sql("SELECT * FROM features", engine)
-    weights = pd.read_sql("SELECT * FROM factor_weights", engine)
+    w = latest_version()
 
-    if weights.empty:
+    if w is None:
         print("No trained weights found")
         return
 
-    w = weights.iloc[0]
+    columns = ["date", "ticker", *MODEL_FACTORS]
 
-    # ---------- Short horizon prediction ----------
-    features["pred_5d"] = (
-        features["rsi_factor"]   * w["short_rsi_factor"] +
-        features["bb_factor"]    * w["short_bb_factor"] +
-        features["macd_factor"]  * w["short_macd_factor"] +
-        features["trend_factor"] * w["short_trend_factor"]
-    )
+    full = full or needs_full_recompute(w["trained_at"])
 
-    # ---------- Medium horizon prediction ----------
-    features["pred_20d"] = (
-        features["rsi_factor"]   * w["med_rsi_factor"] +
-        features["bb_factor"]    * w["med_bb_factor"] +
-        features["macd_factor"]  * w["med_macd_factor"] +
-        features["trend_factor"] * w["med_trend_factor"]
-    )
+    # ---------- rescore everything only when the weights changed ----------
+    if full:
+        features = read_table("features", columns=columns)
+
+    else:
+        features = load_with_lookback("features", "predictions", 0, columns=columns)
+
+    if features.empty:
+        print("Predictions already up to date")
+        return
+
+    scored = predict(features, w)
+
+    if full:
+        result = replace_rows(scored, "predictions")
+    else:
+        result = upsert(scored, "predictions")
+
+    print(f"Predictions updated under weights {w['trained_at']} "
+          f"({result['inserted']:,} inserted, {result['updated']:,} updated)")
 
-    # ---------- Combined prediction score ----------
-    features["prediction_score"] = (
-        0.6 * features["pred_5d"] +
-        0.4 * features["pred_20d"]
-    )
 
-    features[[
-        "date",
-        "ticker",
-        "pred_5d",
-        "pred_20d",
-        "prediction_score"
-    ]].to_sql("predictions", engine,
-              if_exists="replace", index=False)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score features with the latest factor weights")
+    parser.add_argument("--full", action="store_true",
+                        help="rescore every date even if the weights are unchanged")
+    args = parser.parse_args()
 
-    print("Predictions table updated")
+    run_prediction_engine(full=args.full)
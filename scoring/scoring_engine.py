@@ -1,26 +1,56 @@
+import argparse
+import numpy as np
 import pandas as pd
-import yaml
-import os
-from database.db_connection import engine
-from sqlalchemy import text, inspect
+from database.db_connection import config, engine
+from sqlalchemy import text
+from database.writer import upsert
+from utils.incremental import load_with_lookback
+
+
+scoring_config = config.get("scoring", {})
+
+# BUY: RSI below rsi_buy for rsi_buy_days days in a row, Bollinger band
+# ratio above bb_ratio_min and analyst upside of at least upside_min.
+# SELL: RSI at or above rsi_sell.
+SCORING_PARAMS = {
+    "rsi_buy": scoring_config.get("rsi_buy", 30),
+    "rsi_buy_days": scoring_config.get("rsi_buy_days", 3),
+    "bb_ratio_min": scoring_config.get("bb_ratio_min", 0.8),
+    "upside_min": scoring_config.get("upside_min", 0.05),
+    "rsi_sell": scoring_config.get("rsi_sell", 70),
+}
+
+# earlier rows per ticker needed by the consecutive-day RSI condition
+RSI_LOOKBACK = SCORING_PARAMS["rsi_buy_days"] - 1
+
+
+def classify(days_below, rsi, bb_ratio, upside, params=SCORING_PARAMS):
+    """
+    BUY and SELL masks of the scoring rules. `days_below` is the number of
+    the last rsi_buy_days days with RSI under rsi_buy. Works on Series and
+    on dates x tickers arrays alike.
+    """
+
+    buy = (
+        (days_below == params["rsi_buy_days"])
+        & (bb_ratio > params["bb_ratio_min"])
+        & (upside >= params["upside_min"])
+    )
+    sell = rsi >= params["rsi_sell"]
+
+    return buy, sell
 
 
 def run_scoring():
 
     print("Running hybrid scoring engine...")
 
-    # ---------- Load config ----------
-    BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    config_path = os.path.join(BASE_DIR, "config", "settings.yaml")
+    # ---------- Load only dates not yet scored ----------
+    features = load_with_lookback("features", "signals", RSI_LOOKBACK)
 
-    with open(config_path, "r") as f:
-        config = yaml.safe_load(f)
-
-    # ---------- Load data ----------
-    features = pd.read_sql(
-        "SELECT * FROM features ORDER BY ticker, date",
-        engine
-    )
+    if features.empty:
+        print("Signals already up to date")
+        return
 
     analyst = pd.read_sql("SELECT * FROM analyst_expectations", engine)
 
@@ -31,62 +61,75 @@ def run_scoring():
         df["target_mean_price"] - df["close"]
     ) / df["close"]
 
-    df["analyst_condition"] = df["fair_value_upside"] >= 0.05
+    df["analyst_condition"] = df["fair_value_upside"] >= SCORING_PARAMS["upside_min"]
 
     # ---------- Bollinger condition ----------
     df["bb_ratio"] = df["bb_low"] / df["bb_high"]
-    df["bb_condition"] = df["bb_ratio"] > 0.8
+    df["bb_condition"] = df["bb_ratio"] > SCORING_PARAMS["bb_ratio_min"]
 
     # ensure strict ordering for rolling windows
     df = df.sort_values(["ticker", "date"]).reset_index(drop=True)
 
     # ---------- RSI consecutive condition ----------
-    df["rsi_below_30"] = df["rsi"] < 30
+    # column names predate the configurable thresholds
+    df["rsi_below_30"] = df["rsi"] < SCORING_PARAMS["rsi_buy"]
+
+    days = SCORING_PARAMS["rsi_buy_days"]
 
     df["rsi_3day_flag"] = (
         df.groupby("ticker")["rsi_below_30"]
-        .rolling(3, min_periods=3)
+        .rolling(days, min_periods=days)
         .sum()
         .reset_index(level=0, drop=True)
     )
 
     # ---------- Signal logic ----------
-    def assign_signal(row):
-
-        if (
-            row["rsi_3day_flag"] == 3
-            and row["bb_condition"]
-            and row["analyst_condition"]
-        ):
-            return "BUY"
+    buy, sell = classify(
+        df["rsi_3day_flag"], df["rsi"], df["bb_ratio"], df["fair_value_upside"]
+    )
 
-        elif row["rsi"] >= 70:
-            return "SELL"
+    df["signal"] = np.select([buy, sell], ["BUY", "SELL"], default="HOLD")
 
-        elif 30 <= row["rsi"] < 70:
-            return "HOLD"
+    # ranking score
+    df["score"] = 50 - df["rsi"]
 
-        else:
-            return "HOLD"
+    # ---------- drop warm-up rows ----------
+    df = df[df["is_new"]].drop(columns=["is_new"])
 
-    df["signal"] = df.apply(assign_signal, axis=1)
+    # ---------- Upsert by (ticker, date) ----------
+    result = upsert(df, "signals")
 
-    # ranking score
-    df["score"] = 50 - df["rsi"]
+    print(f"Hybrid signals generated successfully "
+          f"({result['inserted']:,} inserted, {result['updated']:,} updated)")
 
-    # ---------- Write to DB (historical safe write) ----------
-    today = df["date"].max()
 
-    inspector = inspect(engine)
+def compact_signals():
 
-    if "signals" in inspector.get_table_names():
+    print("Compacting signals table...")
 
-        with engine.begin() as conn:
-            conn.execute(
-                text("DELETE FROM signals WHERE date = :date "),
-                {"date": today}
+    with engine.begin() as conn:
+        result = conn.execute(text("""
+            DELETE FROM signals
+            WHERE rowid NOT IN (
+                SELECT MAX(rowid)
+                FROM signals
+                GROUP BY ticker, date
             )
+        """))
+
+    with engine.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+
+    print(f"Removed {result.rowcount:,} duplicate signal rows")
+
 
-    df.to_sql("signals", engine, if_exists="append", index=False)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate trading signals")
+    parser.add_argument("--compact", action="store_true",
+                        help="remove duplicate (ticker, date) rows and exit")
+    args = parser.parse_args()
 
-    print("Hybrid signals generated successfully")
+    if args.compact:
+        compact_signals()
+    else:
+        run_scoring()
@@ -1,39 +1,300 @@
+import argparse
+import numpy as np
 import pandas as pd
-from sklearn.linear_model import LinearRegression
-from database.db_connection import engine
+from sqlalchemy import inspect, text
+from database.db_connection import config, engine
+from database.schema import MODEL_FACTORS, WEIGHT_HORIZONS, statistic_pairs
+from database.writer import upsert, replace_rows
+from database.columnar_store import read_table
 
 
-def train_factor_weights():
+WINDOW_DAYS = config.get("model", {}).get("window_days", 730)
+
+HORIZONS = sorted(set(WEIGHT_HORIZONS.values()))
+
+STATISTICS = statistic_pairs()
+
+
+# ---------- Per-date sufficient statistics ----------
+def date_statistics(df) -> pd.DataFrame:
+    """
+    One factor_stats row per (date, horizon): the upper triangle of the
+    Gram matrix of [1, factors, fwd_{h}d] summed over that date's rows.
+    Rows with a missing factor or label contribute nothing.
+    """
+
+    dates, day = np.unique(df["date"].to_numpy(dtype=str), return_inverse=True)
+
+    frames = []
+
+    for h in HORIZONS:
+
+        W = np.column_stack([
+            np.ones(len(df)),
+            df[MODEL_FACTORS].to_numpy(dtype=float),
+            df[f"fwd_{h}d"].to_numpy(dtype=float),
+        ])
+        W[~np.isfinite(W).all(axis=1)] = 0.0
+
+        stats = {"date": dates, "horizon": h}
+
+        for name, i, j in STATISTICS:
+            stats[name] = np.bincount(day, weights=W[:, i] * W[:, j], minlength=len(dates))
+
+        frames.append(pd.DataFrame(stats))
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def needs_full_rebuild() -> bool:
+
+    if "factor_stats" not in inspect(engine).get_table_names():
+        return True
+
+    with engine.connect() as conn:
+
+        stored = {
+            row[0] for row in
+            conn.exec_driver_sql("SELECT DISTINCT horizon FROM factor_stats")
+        }
+
+        if not set(HORIZONS) <= stored:
+            return True
+
+        # a factor added to the config has no statistics for stored dates
+        return any(
+            conn.exec_driver_sql(
+                f'SELECT 1 FROM factor_stats WHERE "{name}" IS NULL LIMIT 1'
+            ).first() is not None
+            for name, _, _ in STATISTICS
+        )
+
+
+def update_statistics(full=False) -> pd.DataFrame:
+    """
+    Recomputes factor_stats for new dates and for the trailing dates whose
+    labels can still have filled in, then returns every stored row.
+    """
+
+    full = full or needs_full_rebuild()
+
+    since = None
+
+    if not full:
+        # labels of the last max(h) stored dates may have been completed
+        since = pd.read_sql(
+            text("""
+                SELECT date FROM factor_stats
+                WHERE horizon = :horizon
+                ORDER BY date DESC
+                LIMIT 1 OFFSET :offset
+            """),
+            engine,
+            params={"horizon": HORIZONS[0], "offset": max(HORIZONS)}
+        )["date"]
+        since = since.iloc[0] if not since.empty else None
+
+    features = read_table("features", columns=["date", "ticker", *MODEL_FACTORS], start=since)
+
+    fwd = pd.read_sql(
+        text(
+            f"SELECT date, ticker, {', '.join(f'fwd_{h}d' for h in HORIZONS)} "
+            f"FROM forward_returns WHERE date >= :since"
+        ),
+        engine,
+        params={"since": since or ""}
+    )
+
+    df = features.merge(fwd, on=["date", "ticker"])
+
+    if not df.empty:
+        stats = date_statistics(df)
+
+        if full or since is None:
+            replace_rows(stats, "factor_stats")
+        else:
+            upsert(stats, "factor_stats")
+
+    return pd.read_sql("SELECT * FROM factor_stats ORDER BY date, horizon", engine)
+
+
+# ---------- Rolling-window solves ----------
+def gram_matrices(stats):
+    """
+    Returns (dates, G) with G[d, h] the symmetric Gram matrix of date d
+    and horizon HORIZONS[h].
+    """
+
+    stats = stats.sort_values(["date", "horizon"])
+
+    dates = stats["date"].unique()
+    size = len(MODEL_FACTORS) + 2
+
+    flat = stats[[name for name, _, _ in STATISTICS]].to_numpy(dtype=float)
+    flat = np.nan_to_num(flat).reshape(len(dates), len(HORIZONS), -1)
+
+    G = np.zeros((len(dates), len(HORIZONS), size, size))
+
+    for k, (_, i, j) in enumerate(STATISTICS):
+        G[:, :, i, j] = flat[:, :, k]
+        G[:, :, j, i] = flat[:, :, k]
+
+    return dates, G
+
+
+def window_fit(dates, G, as_of, window_days=WINDOW_DAYS):
+    """
+    Fits every horizon as of each date index in `as_of` on the dates in
+    [as_of - window_days, as_of] whose h-day label was already realized,
+    i.e. date index <= as_of - h. Window sums are differences of running
+    sums, so every fit costs the same however long the window. Returns
+    (weights [t, h, factor], samples [t, h], r2 [t, h]).
+    """
+
+    as_of = np.asarray(as_of)
+
+    running = np.concatenate([np.zeros_like(G[:1]), np.cumsum(G, axis=0)])
+
+    day = pd.to_datetime(dates).to_numpy()
+    start = np.searchsorted(day, day[as_of] - np.timedelta64(window_days, "D"))
+
+    lag = np.array(HORIZONS)
+    end = np.maximum(as_of[:, None] - lag[None, :] + 1, start[:, None])
+
+    h = np.arange(len(HORIZONS))
+    S = running[end, h] - running[start[:, None], h]
+
+    A = S[..., :-1, :-1]
+    b = S[..., :-1, -1:]
+    samples = S[..., 0, 0]
+
+    # one batched solve for every (date, horizon); pinv keeps empty or
+    # rank-deficient windows finite, they are masked below
+    beta = np.linalg.pinv(A) @ b
+
+    yy = S[..., -1, -1]
+    sum_y = S[..., 0, -1]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sse = yy - (beta[..., 0] * b[..., 0]).sum(axis=-1)
+        sst = yy - sum_y ** 2 / samples
+        r2 = 1 - sse / sst
+
+    weights = beta[..., 1:, 0]
+    weights[samples <= len(MODEL_FACTORS) + 1] = np.nan
+
+    return weights, np.rint(samples).astype(int), r2
+
+
+def weight_frame(weights, samples=None) -> pd.DataFrame:
+
+    frame = {}
+
+    for prefix, horizon in WEIGHT_HORIZONS.items():
+        h = HORIZONS.index(horizon)
+
+        for f, factor in enumerate(MODEL_FACTORS):
+            frame[f"{prefix}_{factor}"] = weights[:, h, f]
+
+        if samples is not None:
+            frame[f"{prefix}_samples"] = samples[:, h]
+
+    return pd.DataFrame(frame)
+
+
+def walk_forward(dates, G, windows=(WINDOW_DAYS,)) -> pd.DataFrame:
+    """
+    Dated weight series: for every window length, the weights a fit on
+    each date would have produced from the labels known on that date.
+    """
+
+    frames = []
+
+    for window_days in windows:
+
+        weights, samples, _ = window_fit(dates, G, np.arange(len(dates)), window_days)
+
+        series = weight_frame(weights, samples)
+        series.insert(0, "window_days", window_days)
+        series.insert(0, "date", dates)
+
+        weight_names = [f"{p}_{f}" for p in WEIGHT_HORIZONS for f in MODEL_FACTORS]
+
+        frames.append(series.dropna(how="all", subset=weight_names))
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def latest_version():
+
+    if "factor_weights" not in inspect(engine).get_table_names():
+        return None
+
+    latest = pd.read_sql(
+        "SELECT * FROM factor_weights ORDER BY trained_at DESC LIMIT 1",
+        engine
+    )
+
+    return None if latest.empty else latest.iloc[0]
+
+
+def train_factor_weights(full=False, windows=None):
 
     print("Training rolling factor weights (multi-horizon)...")
 
-    features = pd.read_sql("SELECT * FROM features", engine)
-    fwd = pd.read_sql("SELECT date,ticker,fwd_5d,fwd_20d FROM forward_returns", engine)
+    stats = update_statistics(full)
+
+    if stats.empty:
+        print("No features with forward returns to train on")
+        return
+
+    dates, G = gram_matrices(stats)
+
+    # ---------- Current weights ----------
+    weights, samples, r2 = window_fit(dates, G, [len(dates) - 1])
+
+    weights_df = weight_frame(weights)
+    weights_df.insert(0, "trained_at", pd.Timestamp.now("UTC").isoformat())
+
+    previous = latest_version()
+    names = list(weights_df.columns[1:])
 
-    df = features.merge(fwd, on=["date", "ticker"]).dropna()
-    df["date"] = pd.to_datetime(df["date"])
+    # keep every trained version, predictions use the latest; identical
+    # weights are not a new version, so predictions are not rescored
+    if previous is not None and np.array_equal(
+        previous.reindex(names).to_numpy(dtype=float),
+        weights_df[names].iloc[0].to_numpy(dtype=float),
+        equal_nan=True
+    ):
+        print(f"  weights unchanged since {previous['trained_at']}")
+    else:
+        upsert(weights_df, "factor_weights")
 
-    cutoff = df["date"].max() - pd.Timedelta(days=730)
-    train_df = df[df["date"] >= cutoff]
+    for prefix, horizon in WEIGHT_HORIZONS.items():
+        h = HORIZONS.index(horizon)
+        print(f"  {prefix} ({horizon}d): {samples[0, h]:,} samples, R² {r2[0, h]:.4f}")
 
-    X = train_df[["rsi_factor", "bb_factor", "macd_factor", "trend_factor"]]
+    # ---------- Walk-forward series ----------
+    series = walk_forward(dates, G, windows or [WINDOW_DAYS])
 
-    # ---------- Short horizon ----------
-    model_short = LinearRegression()
-    model_short.fit(X, train_df["fwd_5d"])
-    short_weights = dict(zip(X.columns, model_short.coef_))
+    upsert(series, "walk_forward_weights")
 
-    # ---------- Medium horizon ----------
-    model_med = LinearRegression()
-    model_med.fit(X, train_df["fwd_20d"])
-    med_weights = dict(zip(X.columns, model_med.coef_))
+    print(f"Multi-horizon weights trained "
+          f"({len(series):,} walk-forward rows through {dates[-1]})")
 
-    weights_df = pd.DataFrame([{
-        **{f"short_{k}": v for k, v in short_weights.items()},
-        **{f"med_{k}": v for k, v in med_weights.items()}
-    }])
 
-    weights_df.to_sql("factor_weights", engine,
-                      if_exists="replace", index=False)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train factor weights")
+    parser.add_argument("--full", action="store_true",
+                        help="recompute the per-date statistics from scratch")
+    parser.add_argument("--windows", type=int, nargs="+",
+                        help=f"walk-forward window lengths in days (default {WINDOW_DAYS})")
+    parser.add_argument("--cv", action="store_true",
+                        help="score the model out of sample (scoring.cross_validation) instead")
+    args = parser.parse_args()
 
-    print("Multi-horizon weights trained")
+    if args.cv:
+        from scoring.cross_validation import run_cross_validation
+        run_cross_validation()
+    else:
+        train_factor_weights(full=args.full, windows=args.windows)
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import pytest
+from features.technical_indicators import add_indicators
+from features.panel_indicators import add_indicators_panel
+
+
+INDICATOR_COLUMNS = [
+    "rsi", "bb_high", "bb_low", "macd",
+    "rsi_factor", "bb_factor", "macd_factor", "trend_factor",
+]
+
+
+# ---------- Reference: the per-ticker ta loop ----------
+def reference_indicators(prices):
+
+    frames = [
+        add_indicators(df.sort_values("date").copy())
+        for _, df in prices.groupby("ticker")
+    ]
+
+    return pd.concat(frames).sort_values(["ticker", "date"]).reset_index(drop=True)
+
+
+def random_prices(seed, n_tickers=6, n_dates=300):
+    """
+    Seeded random walks with uneven listing lengths and missing closes,
+    shuffled so the engine has to sort.
+    """
+
+    rng = np.random.default_rng(seed)
+
+    dates = pd.date_range("2022-01-03", periods=n_dates, freq="B").strftime("%Y-%m-%d")
+
+    frames = []
+
+    for i in range(n_tickers):
+
+        # some histories shorter than every warm-up window, some longer
+        length = int(rng.choice([5, 15, 27, n_dates]) if i % 2 else n_dates)
+        start = int(rng.integers(0, n_dates - length + 1))
+
+        close = 50 * np.exp(np.cumsum(rng.normal(0, rng.uniform(0.005, 0.04), length)))
+
+        # isolated gaps and a run of missing bars, like empty download rows
+        close[rng.random(length) < 0.03] = np.nan
+        if length > 60:
+            gap = int(rng.integers(0, length - 10))
+            close[gap:gap + int(rng.integers(2, 8))] = np.nan
+
+        frames.append(pd.DataFrame({
+            "date": dates[start:start + length],
+            "ticker": f"T{i:02d}",
+            "close": close.round(4)
+        }))
+
+    prices = pd.concat(frames, ignore_index=True)
+
+    return prices.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def assert_matches_reference(prices):
+
+    expected = reference_indicators(prices)
+    actual = add_indicators_panel(prices).sort_values(["ticker", "date"]).reset_index(drop=True)
+
+    for col in INDICATOR_COLUMNS:
+
+        a = expected[col].to_numpy(dtype=float)
+        b = actual[col].to_numpy(dtype=float)
+
+        # same warm-up and gap positions
+        assert np.array_equal(np.isnan(a), np.isnan(b)), col
+
+        both = ~np.isnan(a)
+        error = np.abs(a[both] - b[both]) / np.maximum(1, np.abs(a[both]))
+
+        assert np.max(error, initial=0) <= 1e-9, col
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_panel_matches_ta(seed):
+
+    assert_matches_reference(random_prices(seed))
+
+
+def test_panel_edge_cases():
+
+    dates = pd.date_range("2024-01-01", periods=60, freq="B").strftime("%Y-%m-%d")
+
+    prices = pd.concat([
+        # flat prices: no down moves, so RSI saturates at 100
+        pd.DataFrame({"date": dates, "ticker": "FLAT", "close": 10.0}),
+        # leading missing closes before the first bar
+        pd.DataFrame({"date": dates, "ticker": "LATE",
+                      "close": np.r_[[np.nan] * 25, np.linspace(20, 30, 35)]}),
+        # a single bar
+        pd.DataFrame({"date": dates[:1], "ticker": "ONE", "close": [5.0]}),
+    ], ignore_index=True)
+
+    assert_matches_reference(prices)
+
+
+def test_panel_keeps_row_order():
+
+    prices = random_prices(0)
+
+    actual = add_indicators_panel(prices)
+
+    pd.testing.assert_frame_equal(actual[prices.columns], prices)
@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+import pytest
+from backtesting.trade_kernel import pair_trades, extract_trades
+
+
+# ---------- Reference: the previous per-ticker iterrows loop ----------
+def reference_trades(signals):
+
+    signals = signals.sort_values(["ticker", "date"])
+
+    trades = []
+    open_positions = []
+
+    for ticker, df in signals.groupby("ticker"):
+
+        open_trade = None
+
+        for _, row in df.iterrows():
+
+            if row["signal"] == "BUY" and open_trade is None:
+                open_trade = {
+                    "ticker": ticker,
+                    "buy_date": row["date"],
+                    "buy_price": row["close"]
+                }
+
+            elif row["signal"] == "SELL" and open_trade is not None:
+
+                trades.append({
+                    **open_trade,
+                    "sell_date": row["date"],
+                    "sell_price": row["close"],
+                    "return_pct":
+                        (row["close"] - open_trade["buy_price"])
+                        / open_trade["buy_price"]
+                })
+                open_trade = None
+
+        if open_trade is not None:
+            open_positions.append(open_trade)
+
+    trades = pd.DataFrame(trades, columns=[
+        "ticker", "buy_date", "buy_price", "sell_date", "sell_price", "return_pct"
+    ])
+    open_positions = pd.DataFrame(open_positions, columns=["ticker", "buy_date", "buy_price"])
+
+    return trades, open_positions
+
+
+def random_signals(seed, n_tickers=8, n_dates=60):
+    """
+    Seeded BUY/SELL/HOLD sequences, shuffled so the kernel has to sort.
+    """
+
+    rng = np.random.default_rng(seed)
+
+    dates = pd.date_range("2024-01-01", periods=n_dates, freq="B").strftime("%Y-%m-%d")
+    tickers = [f"T{i:02d}" for i in range(n_tickers)]
+
+    frame = pd.DataFrame(
+        [(d, t) for t in tickers for d in dates],
+        columns=["date", "ticker"]
+    )
+
+    # per-ticker mixes, so some tickers are mostly flat and others churn
+    p_event = rng.uniform(0.05, 0.6, n_tickers).repeat(n_dates)
+    event = rng.random(len(frame)) < p_event
+    buy = rng.random(len(frame)) < 0.5
+
+    frame["signal"] = np.where(event, np.where(buy, "BUY", "SELL"), "HOLD")
+    frame["close"] = rng.uniform(10, 200, len(frame)).round(2)
+
+    # a few tickers with no history in the window
+    frame = frame[~frame["ticker"].isin(rng.choice(tickers, 1))]
+
+    return frame.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_extract_trades_matches_reference(seed):
+
+    signals = random_signals(seed)
+
+    trades, open_positions = extract_trades(signals, with_open=True)
+    expected_trades, expected_open = reference_trades(signals)
+
+    pd.testing.assert_frame_equal(trades.reset_index(drop=True), expected_trades,
+                                  check_dtype=False)
+    pd.testing.assert_frame_equal(open_positions.reset_index(drop=True), expected_open,
+                                  check_dtype=False)
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_pair_trades_matches_reference(seed):
+
+    signals = random_signals(seed).sort_values(["ticker", "date"]).reset_index(drop=True)
+
+    entry_idx, exit_idx, open_idx = pair_trades(signals["ticker"], signals["signal"])
+    expected_trades, expected_open = reference_trades(signals)
+
+    entries = signals.iloc[entry_idx]
+    exits = signals.iloc[exit_idx]
+
+    assert list(entries["ticker"]) == list(expected_trades["ticker"])
+    assert list(entries["date"]) == list(expected_trades["buy_date"])
+    assert list(exits["ticker"]) == list(expected_trades["ticker"])
+    assert list(exits["date"]) == list(expected_trades["sell_date"])
+
+    assert list(signals.iloc[open_idx]["date"]) == list(expected_open["buy_date"])
+    assert list(signals.iloc[open_idx]["ticker"]) == list(expected_open["ticker"])
+
+
+def test_pair_trades_edge_cases():
+
+    empty = pair_trades([], [])
+    assert all(len(positions) == 0 for positions in empty)
+
+    # repeated BUYs keep the first entry, SELLs while flat are ignored,
+    # and a position never carries across a ticker boundary
+    entry_idx, exit_idx, open_idx = pair_trades(
+        ["A", "A", "A", "A", "B", "B", "C"],
+        ["SELL", "BUY", "BUY", "SELL", "SELL", "BUY", "HOLD"]
+    )
+
+    assert list(entry_idx) == [1]
+    assert list(exit_idx) == [3]
+    assert list(open_idx) == [5]
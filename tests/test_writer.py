@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+from database.db_connection import make_engine
+from database.writer import upsert, replace_rows
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return make_engine(tmp_path / "test.db")
+
+
+def read(engine, query):
+    with engine.connect() as conn:
+        return pd.read_sql(query, conn)
+
+
+def test_upsert_updates_by_primary_key(engine):
+
+    rows = pd.DataFrame({
+        "ticker": ["A", "B", "A"],
+        "trades": [1, 2, 3],
+        "success_rate": [0.5, 0.5, 0.75],
+        "avg_return": [0.01, 0.02, 0.03],
+    })
+
+    with engine.begin() as conn:
+        # the later duplicate of a key wins
+        assert upsert(rows, "signal_success_by_company", conn) == {"inserted": 2, "updated": 0}
+        assert upsert(rows.iloc[[1]].assign(trades=5), "signal_success_by_company", conn) \
+            == {"inserted": 0, "updated": 1}
+
+    stored = read(engine, "SELECT ticker, trades FROM signal_success_by_company ORDER BY ticker")
+    assert stored.values.tolist() == [["A", 3], ["B", 5]]
+
+
+def test_replace_rows_on_table_without_primary_key(engine):
+
+    summary = pd.DataFrame([{"success_rate": 0.6, "avg_return": 0.02, "num_trades": 10}])
+
+    with engine.begin() as conn:
+        assert replace_rows(summary, "signal_success_metrics", conn) == {"inserted": 1, "updated": 0}
+        assert replace_rows(summary.assign(num_trades=12), "signal_success_metrics", conn) \
+            == {"inserted": 1, "updated": 0}
+
+    stored = read(engine, "SELECT * FROM signal_success_metrics")
+    assert stored.to_dict("records") == [{"success_rate": 0.6, "avg_return": 0.02, "num_trades": 12}]
+
+
+def test_upsert_without_primary_key_keeps_identical_rows(engine):
+
+    rows = pd.DataFrame([{"success_rate": 0.5, "avg_return": 0.0, "num_trades": 1}] * 3)
+
+    with engine.begin() as conn:
+        assert upsert(rows, "signal_success_metrics", conn, chunk_size=2)["inserted"] == 3
+
+    assert len(read(engine, "SELECT * FROM signal_success_metrics")) == 3
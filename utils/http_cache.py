@@ -0,0 +1,251 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import urlparse
+from database.db_connection import BASE_DIR, config
+
+
+cache_config = config.get("cache", {})
+
+CACHE_PATH = os.path.join(BASE_DIR, cache_config.get("path", "cache/http_cache.db"))
+TTL_SECONDS = cache_config.get("ttl_seconds", {})
+
+_lock = threading.Lock()
+_conn = None
+
+stats = {"hits": 0, "misses": 0, "revalidated": 0, "stale": 0}
+
+
+class CacheMiss(Exception):
+    """Raised in offline mode when nothing is cached for a request."""
+
+
+def is_offline() -> bool:
+    return os.environ.get("VESIGN_OFFLINE") == "1" or cache_config.get("offline", False)
+
+
+def ttl_for(endpoint: str) -> int:
+    return TTL_SECONDS.get(endpoint, TTL_SECONDS.get("default", 3600))
+
+
+def _connection():
+
+    global _conn
+
+    if _conn is None:
+        os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+
+        _conn = sqlite3.connect(CACHE_PATH, check_same_thread=False)
+        _conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                endpoint TEXT,
+                fetched_at REAL,
+                etag TEXT,
+                last_modified TEXT,
+                payload BLOB
+            )
+        """)
+
+    return _conn
+
+
+def _key(endpoint: str, request) -> str:
+    raw = json.dumps([endpoint, request], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _load(key):
+
+    with _lock:
+        row = _connection().execute(
+            "SELECT fetched_at, etag, last_modified, payload FROM responses WHERE key = ?",
+            (key,)
+        ).fetchone()
+
+    if row is None:
+        return None
+
+    fetched_at, etag, last_modified, payload = row
+
+    return {
+        "fetched_at": fetched_at,
+        "etag": etag,
+        "last_modified": last_modified,
+        "payload": zlib.decompress(payload)
+    }
+
+
+def _store(key, endpoint, payload: bytes, etag=None, last_modified=None):
+
+    with _lock:
+        conn = _connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+            (key, endpoint, time.time(), etag, last_modified, zlib.compress(payload))
+        )
+        conn.commit()
+
+
+def _touch(key):
+
+    with _lock:
+        conn = _connection()
+        conn.execute(
+            "UPDATE responses SET fetched_at = ? WHERE key = ?",
+            (time.time(), key)
+        )
+        conn.commit()
+
+
+def _count(name):
+    with _lock:
+        stats[name] += 1
+
+
+def get(url: str, params=None, headers=None, ttl=None) -> bytes:
+    """
+    HTTP GET through the on-disk cache. Fresh entries are served without any
+    network call; expired ones are revalidated with ETag / Last-Modified.
+    Stale entries are served when offline or when the request fails.
+    """
+
+    import requests
+
+    endpoint = urlparse(url).netloc
+    ttl = ttl_for(endpoint) if ttl is None else ttl
+
+    key = _key(endpoint, [url, params])
+    cached = _load(key)
+
+    if cached and time.time() - cached["fetched_at"] < ttl:
+        _count("hits")
+        return cached["payload"]
+
+    if cached and is_offline():
+        _count("stale")
+        return cached["payload"]
+
+    if is_offline():
+        raise CacheMiss(url)
+
+    headers = dict(headers or {})
+
+    if cached and cached["etag"]:
+        headers["If-None-Match"] = cached["etag"]
+    if cached and cached["last_modified"]:
+        headers["If-Modified-Since"] = cached["last_modified"]
+
+    try:
+        response = requests.get(url, params=params, headers=headers, timeout=30)
+
+        if response.status_code == 304 and cached:
+            _touch(key)
+            _count("revalidated")
+            return cached["payload"]
+
+        response.raise_for_status()
+
+    except Exception:
+        if cached:
+            _count("stale")
+            return cached["payload"]
+        raise
+
+    _count("misses")
+
+    _store(
+        key,
+        endpoint,
+        response.content,
+        etag=response.headers.get("ETag"),
+        last_modified=response.headers.get("Last-Modified")
+    )
+
+    return response.content
+
+
+def _is_empty(result) -> bool:
+    """
+    True for the None / empty frame / {} that library calls such as
+    yf.download or Ticker.info return instead of raising on failure.
+    """
+
+    if result is None:
+        return True
+
+    empty = getattr(result, "empty", None)
+    if isinstance(empty, bool):
+        return empty
+
+    try:
+        return len(result) == 0
+    except TypeError:
+        return False
+
+
+def memoize(endpoint: str, request, fn, ttl=None):
+    """
+    Caches the result of a library call (e.g. yfinance) under
+    (endpoint, request) with the endpoint's TTL. Results are pickled.
+    Empty results are treated as failed fetches and never cached.
+    """
+
+    ttl = ttl_for(endpoint) if ttl is None else ttl
+
+    key = _key(endpoint, request)
+    cached = _load(key)
+
+    if cached and time.time() - cached["fetched_at"] < ttl:
+        _count("hits")
+        return pickle.loads(cached["payload"])
+
+    if cached and is_offline():
+        _count("stale")
+        return pickle.loads(cached["payload"])
+
+    if is_offline():
+        raise CacheMiss(f"{endpoint} {request}")
+
+    try:
+        result = fn()
+
+    except Exception:
+        if cached:
+            _count("stale")
+            return pickle.loads(cached["payload"])
+        raise
+
+    # an empty result is a silent failure; caching it would hide the data
+    # for a whole TTL after the source recovers
+    if _is_empty(result):
+        if cached:
+            _count("stale")
+            return pickle.loads(cached["payload"])
+
+        _count("misses")
+        return result
+
+    _count("misses")
+
+    _store(key, endpoint, pickle.dumps(result))
+
+    return result
+
+
+def clear(endpoint=None):
+
+    with _lock:
+        conn = _connection()
+
+        if endpoint is None:
+            conn.execute("DELETE FROM responses")
+        else:
+            conn.execute("DELETE FROM responses WHERE endpoint = ?", (endpoint,))
+
+        conn.commit()
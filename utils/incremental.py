@@ -0,0 +1,60 @@
+import pandas as pd
+from sqlalchemy import text, inspect
+from database.db_connection import engine
+
+
+def load_with_lookback(source: str, target: str, lookback: int, columns=None) -> pd.DataFrame:
+    """
+    Returns the rows of `source` that are newer than each ticker's last date
+    in `target`, plus up to `lookback` earlier rows per ticker so rolling
+    indicators can warm up. The `is_new` column marks rows still to be written.
+    `columns` limits the source columns read (default: all).
+    """
+
+    inspector = inspect(engine)
+
+    if columns is None:
+        column_list = "s.*"
+    else:
+        column_list = ", ".join(f's."{c}"' for c in columns)
+
+    if target not in inspector.get_table_names():
+        df = pd.read_sql(f"SELECT {column_list} FROM {source} s", engine)
+        df["is_new"] = True
+        return df
+
+    # the per-ticker cutoff (the date `lookback` stored bars back) is found
+    # by a seek on the (ticker, date) key; bounds is materialized so the
+    # final join is a range seek on that key too, not a scan of the table
+    query = text(f"""
+        WITH last AS (
+            SELECT ticker, MAX(date) AS last_date
+            FROM {target}
+            GROUP BY ticker
+        ),
+        bounds AS MATERIALIZED (
+            SELECT t.ticker,
+                   l.last_date,
+                   COALESCE((SELECT s.date FROM {source} s
+                             WHERE s.ticker = t.ticker AND s.date <= l.last_date
+                             ORDER BY s.date DESC
+                             LIMIT 1 OFFSET :lookback), '') AS before_date
+            FROM (SELECT DISTINCT ticker FROM {source}) t
+            LEFT JOIN last l ON l.ticker = t.ticker
+            WHERE l.last_date IS NULL
+               OR EXISTS (SELECT 1 FROM {source} s
+                          WHERE s.ticker = t.ticker AND s.date > l.last_date)
+        )
+        SELECT {column_list},
+               CASE WHEN b.last_date IS NULL OR s.date > b.last_date
+                    THEN 1 ELSE 0 END AS is_new
+        FROM bounds b
+        JOIN {source} s
+          ON s.ticker = b.ticker AND s.date > b.before_date
+    """)
+
+    df = pd.read_sql(query, engine, params={"lookback": lookback})
+
+    df["is_new"] = df["is_new"].astype(bool)
+
+    return df
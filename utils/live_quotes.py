@@ -0,0 +1,195 @@
+import threading
+import time
+from datetime import datetime, time as dt_time, UTC
+import numpy as np
+import pytz
+from database.db_connection import config
+
+
+quotes_config = config.get("live_quotes", {})
+
+INTERVAL_SECONDS = quotes_config.get("interval_seconds", 60)
+STALE_AFTER_SECONDS = quotes_config.get("stale_after_seconds", 180)
+
+
+def market_is_open():
+    et = pytz.timezone("US/Eastern")
+    now = datetime.now(UTC).astimezone(et)
+    return now.weekday() < 5 and dt_time(9, 30) <= now.time() <= dt_time(16, 0)
+
+
+# ---------- Quote sources ----------
+# A source takes a list of tickers and returns {ticker: last price}.
+def yfinance_quotes(tickers):
+
+    import yfinance as yf
+
+    live_data = yf.download(
+        tickers,
+        period="1d",
+        interval="1m",
+        progress=False,
+        group_by="column"
+    )
+
+    prices = {}
+
+    for t in tickers:
+        try:
+            prices[t] = float(live_data["Close"][t].dropna().iloc[-1])
+        except (KeyError, IndexError):
+            prices[t] = None
+
+    return prices
+
+
+def random_walk_quotes(start_prices, volatility=0.001, seed=None):
+    """
+    Local fake feed: every call moves each ticker's price by a random
+    step. Tickers without a start price begin at 100.
+    """
+
+    rng = np.random.default_rng(seed)
+    prices = dict(start_prices)
+
+    def source(tickers):
+        for t in tickers:
+            prices[t] = prices.get(t, 100.0) * (1 + rng.normal(0, volatility))
+        return {t: prices[t] for t in tickers}
+
+    return source
+
+
+# ---------- Poller ----------
+class QuotePoller:
+    """
+    Refreshes the latest price of every tracked ticker on a background
+    thread. Readers get the last stored quotes without waiting on the
+    network; `track` only registers tickers and wakes the thread.
+    """
+
+    def __init__(self, source=yfinance_quotes, interval=INTERVAL_SECONDS,
+                 stale_after=STALE_AFTER_SECONDS, active=market_is_open):
+
+        self.source = source
+        self.interval = interval
+        self.stale_after = stale_after
+        self.active = active
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._tickers = set()
+        self._quotes = {}
+
+        self._stats = {
+            "polls": 0,
+            "errors": 0,
+            "consecutive_errors": 0,
+            "last_error": None,
+            "last_success": None,
+            "last_poll_seconds": None,
+        }
+
+    def start(self):
+
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="quote-poller", daemon=True
+            )
+            self._thread.start()
+
+        return self
+
+    def stop(self, timeout=5):
+
+        self._stop.set()
+        self._wake.set()
+
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def track(self, tickers):
+
+        with self._lock:
+            new = set(tickers) - self._tickers
+            self._tickers.update(new)
+
+        if new:
+            self._wake.set()
+
+    def quotes(self, tickers=None) -> dict:
+
+        with self._lock:
+            if tickers is None:
+                return dict(self._quotes)
+            return {t: self._quotes.get(t) for t in tickers}
+
+    def staleness(self):
+        """
+        Seconds since the last successful refresh, None before the first.
+        """
+
+        last = self._stats["last_success"]
+        return None if last is None else time.time() - last
+
+    def is_stale(self) -> bool:
+
+        age = self.staleness()
+        return age is None or age > self.stale_after
+
+    def metrics(self) -> dict:
+
+        with self._lock:
+            metrics = dict(self._stats)
+            metrics["tracked"] = len(self._tickers)
+            metrics["quoted"] = sum(v is not None for v in self._quotes.values())
+
+        metrics["staleness_seconds"] = self.staleness()
+        metrics["stale"] = self.is_stale()
+        metrics["running"] = self._thread is not None and self._thread.is_alive()
+
+        return metrics
+
+    def poll(self):
+
+        with self._lock:
+            tickers = sorted(self._tickers)
+
+        if not tickers:
+            return
+
+        started = time.time()
+
+        try:
+            prices = self.source(tickers)
+
+        except Exception as e:
+            with self._lock:
+                self._stats["errors"] += 1
+                self._stats["consecutive_errors"] += 1
+                self._stats["last_error"] = f"{type(e).__name__}: {e}"
+            return
+
+        with self._lock:
+            # a failed lookup keeps the previous quote instead of blanking it
+            self._quotes.update({t: p for t, p in prices.items() if p is not None})
+            self._stats["polls"] += 1
+            self._stats["consecutive_errors"] = 0
+            self._stats["last_success"] = time.time()
+            self._stats["last_poll_seconds"] = time.time() - started
+
+    def _run(self):
+
+        while not self._stop.is_set():
+
+            # cleared before polling so a `track` during the poll is not lost
+            self._wake.clear()
+
+            if self.active():
+                self.poll()
+
+            self._wake.wait(self.interval)
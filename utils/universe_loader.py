@@ -1,27 +1,51 @@
+import hashlib
 import pandas as pd
-import requests
+from datetime import datetime, UTC
 from io import StringIO
+from sqlalchemy import text, inspect
 from database.db_connection import engine
+from database.writer import upsert, replace_rows
+from providers import get_provider
+from utils import http_cache
+
+
+UNIVERSE_URL = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
 
 
 def load_universe():
 
     print("Loading S&P 500 universe...")
 
-    url = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
-
     headers = {"User-Agent": "Mozilla/5.0"}
 
-    response = requests.get(url, headers=headers)
-    html = StringIO(response.text)
+    try:
+        payload = http_cache.get(UNIVERSE_URL, headers=headers)
+
+    except http_cache.CacheMiss:
+        # offline with nothing cached (air-gapped / replay runs): keep the
+        # stored universe, or take a first one from the provider's data
+        if not pd.read_sql("SELECT 1 FROM companies LIMIT 1", engine).empty:
+            print("Universe page unavailable offline - using stored companies")
+        elif not universe_from_provider():
+            raise
+
+        return cached_tickers()
 
-    table = pd.read_html(html)[0]
+    source_hash = hashlib.sha256(payload).hexdigest()
+
+    latest = latest_snapshot()
+
+    # ---------- same page as last time: nothing to parse ----------
+    if latest is not None and latest["source_hash"] == source_hash:
+        return cached_tickers()
+
+    table = pd.read_html(StringIO(payload.decode("utf-8")))[0]
 
     # Fix ticker formatting for Yahoo Finance
     table["Symbol"] = table["Symbol"].str.replace(".", "-", regex=False)
 
     # Base company table
-    companies = table[["Symbol", "Security", "GICS Sector"]].rename(
+    members = table[["Symbol", "Security", "GICS Sector"]].rename(
         columns={
             "Symbol": "ticker",
             "Security": "company",
@@ -29,6 +53,103 @@ def load_universe():
         }
     )
 
+    membership_hash = hashlib.sha256(
+        members.sort_values("ticker").to_csv(index=False).encode()
+    ).hexdigest()
+
+    today = datetime.now(UTC).date().isoformat()
+
+    # ---------- same membership: only remember the new page hash ----------
+    if latest is not None and latest["membership_hash"] == membership_hash:
+        with engine.begin() as conn:
+            conn.execute(
+                text("""
+                    UPDATE universe_snapshots SET source_hash = :source_hash
+                    WHERE snapshot_date = :snapshot_date
+                """),
+                {"source_hash": source_hash, "snapshot_date": latest["snapshot_date"]}
+            )
+
+        return cached_tickers()
+
+    if latest is None:
+        changes = bootstrap_universe(members, table, today)
+    else:
+        changes = apply_universe_diff(members, table, today)
+
+    snapshot = pd.DataFrame([{
+        "snapshot_date": today,
+        "membership_hash": membership_hash,
+        "source_hash": source_hash,
+        "n_tickers": len(members),
+        **changes
+    }])
+
+    upsert(snapshot, "universe_snapshots")
+
+    print(f"Universe changed: {changes['added']} added, "
+          f"{changes['removed']} removed, {changes['renamed']} renamed")
+
+    return cached_tickers()
+
+
+def universe_from_provider() -> bool:
+    """
+    Seeds companies and membership from the market data provider's own
+    tickers and reference info (a replay directory's bars and info.csv).
+    False when the provider has no fixed ticker set.
+    """
+
+    provider = get_provider()
+    tickers = provider.tickers()
+
+    if not tickers:
+        return False
+
+    info = [provider.info(ticker) for ticker in tickers]
+
+    members = pd.DataFrame({
+        "ticker": tickers,
+        "company": [i.get("longName", ticker) for i, ticker in zip(info, tickers)],
+        "sector": [i.get("sector") for i in info]
+    })
+
+    print(f"Universe page unavailable offline - using the {provider.name} provider's "
+          f"{len(members)} tickers")
+
+    bootstrap_universe(members, pd.DataFrame(), datetime.now(UTC).date().isoformat())
+
+    return True
+
+
+def latest_snapshot():
+
+    if "universe_snapshots" not in inspect(engine).get_table_names():
+        return None
+
+    snapshot = pd.read_sql("""
+        SELECT * FROM universe_snapshots
+        ORDER BY snapshot_date DESC
+        LIMIT 1
+    """, engine)
+
+    if snapshot.empty:
+        return None
+
+    return snapshot.iloc[0]
+
+
+def cached_tickers():
+
+    tickers = pd.read_sql("SELECT ticker FROM companies", engine)["ticker"].tolist()
+
+    print(f"Loaded {len(tickers)} tickers")
+
+    return tickers
+
+
+def add_company_columns(companies, table):
+
     # ---------- Website extraction if available ----------
     if "Website" in table.columns:
 
@@ -56,18 +177,132 @@ def load_universe():
             .str.replace(" ", "") + ".com"
         )
 
-    # Logo URL
     # Logo URL based on ticker (reliable)
     companies["logo_url"] = (
             "https://financialmodelingprep.com/image-stock/" +
             companies["ticker"] + ".png"
     )
 
-    # Save companies table
-    companies.to_sql("companies", engine, if_exists="replace", index=False)
+    return companies
 
-    tickers = companies["ticker"].tolist()
 
-    print(f"Loaded {len(tickers)} tickers")
+def bootstrap_universe(members, table, today):
 
-    return tickers
+    companies = add_company_columns(members.copy(), table)
+
+    # membership start from the page's "Date added" column when present
+    if "Date added" in table.columns:
+        start = pd.to_datetime(table["Date added"], errors="coerce").dt.strftime("%Y-%m-%d")
+        start = start.fillna(today).to_numpy()
+    else:
+        start = today
+
+    history = pd.DataFrame({
+        "ticker": members["ticker"].to_numpy(),
+        "company": members["company"].to_numpy(),
+        "start_date": start,
+        "end_date": None,
+        "renamed_to": None
+    })
+
+    with engine.begin() as conn:
+        replace_rows(companies, "companies", conn)
+        replace_rows(history, "universe_membership", conn)
+
+    return {"added": len(members), "removed": 0, "renamed": 0}
+
+
+def apply_universe_diff(members, table, today):
+
+    current = pd.read_sql("SELECT ticker, company, sector FROM companies", engine)
+
+    added = members[~members["ticker"].isin(current["ticker"])]
+    removed = current[~current["ticker"].isin(members["ticker"])]
+
+    # ---------- a removed and an added ticker of the same company: rename ----------
+    renamed = removed.merge(
+        added[["ticker", "company"]], on="company", suffixes=("", "_new")
+    ).drop_duplicates("ticker").drop_duplicates("ticker_new")
+
+    added = added[~added["ticker"].isin(renamed["ticker_new"])]
+    removed = removed[~removed["ticker"].isin(renamed["ticker"])]
+
+    # ---------- name / sector edits of tickers that stayed ----------
+    edited = members.merge(current, on="ticker", suffixes=("", "_old"))
+    edited = edited[
+        (edited["company"] != edited["company_old"])
+        | (edited["sector"] != edited["sector_old"])
+    ]
+
+    new_rows = add_company_columns(added.copy(), table)
+
+    with engine.begin() as conn:
+
+        for row in removed.itertuples():
+            conn.execute(text("DELETE FROM companies WHERE ticker = :t"), {"t": row.ticker})
+            conn.execute(
+                text("""
+                    UPDATE universe_membership SET end_date = :d
+                    WHERE ticker = :t AND end_date IS NULL
+                """),
+                {"t": row.ticker, "d": today}
+            )
+
+        for row in renamed.itertuples():
+            conn.execute(
+                text("""
+                    UPDATE companies SET ticker = :new, logo_url = :logo
+                    WHERE ticker = :old
+                """),
+                {
+                    "old": row.ticker,
+                    "new": row.ticker_new,
+                    "logo": f"https://financialmodelingprep.com/image-stock/{row.ticker_new}.png"
+                }
+            )
+            conn.execute(
+                text("""
+                    UPDATE universe_membership SET end_date = :d, renamed_to = :new
+                    WHERE ticker = :old AND end_date IS NULL
+                """),
+                {"old": row.ticker, "new": row.ticker_new, "d": today}
+            )
+
+        for row in edited.itertuples():
+            conn.execute(
+                text("UPDATE companies SET company = :c, sector = :s WHERE ticker = :t"),
+                {"t": row.ticker, "c": row.company, "s": row.sector}
+            )
+
+        upsert(new_rows, "companies", conn)
+
+        history = pd.DataFrame({
+            "ticker": pd.concat([added["ticker"], renamed["ticker_new"]]).to_numpy(),
+            "company": pd.concat([added["company"], renamed["company"]]).to_numpy(),
+            "start_date": today,
+            "end_date": None,
+            "renamed_to": None
+        })
+
+        upsert(history, "universe_membership", conn)
+
+    return {"added": len(added), "removed": len(removed), "renamed": len(renamed)}
+
+
+def universe_as_of(date) -> list:
+    """
+    Returns the tickers that were index members on `date`, from the stored
+    membership history (no download).
+    """
+
+    date = pd.Timestamp(date).strftime("%Y-%m-%d")
+
+    return pd.read_sql(
+        text("""
+            SELECT ticker FROM universe_membership
+            WHERE start_date <= :d
+              AND (end_date IS NULL OR end_date > :d)
+        """),
+        engine,
+        params={"d": date}
+    )["ticker"].tolist()
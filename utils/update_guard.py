@@ -1,6 +1,7 @@
 import pandas as pd
 from datetime import datetime, timedelta, UTC
 from database.db_connection import engine
+from database.writer import upsert
 
 
 def should_run(job_name: str, frequency_hours: int = 24) -> bool:
@@ -32,18 +33,4 @@ def mark_run(job_name: str):
 
     now = datetime.now(UTC).isoformat()
 
-    try:
-        df = pd.read_sql("SELECT * FROM pipeline_control", engine)
-
-        if job_name in df["job_name"].values:
-            df.loc[df["job_name"] == job_name, "last_run"] = now
-        else:
-            df = pd.concat(
-                [df, pd.DataFrame([{"job_name": job_name, "last_run": now}])]
-            )
-
-    except Exception:
-        df = pd.DataFrame([{"job_name": job_name, "last_run": now}])
-
-    df.to_sql("pipeline_control", engine, if_exists="replace", index=False)
-
+    upsert(pd.DataFrame([{"job_name": job_name, "last_run": now}]), "pipeline_control")